@@ -0,0 +1,123 @@
+// Browser-side multipart upload: the file is sliced into parts that are PUT
+// directly to S3 with presigned URLs, so the bytes never pass through Dash.
+(function () {
+  const MAX_CONCURRENT_PARTS = 4;
+  const MAX_CONCURRENT_FILES = 2;
+
+  async function postJson(url, body) {
+    const response = await fetch(url, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(body),
+    });
+    if (!response.ok) {
+      throw new Error(`${url} returned ${response.status}`);
+    }
+    return response.json();
+  }
+
+  function setProps(id, props) {
+    window.dash_clientside.set_props(id, props);
+  }
+
+  async function uploadFile(file) {
+    const session = await postJson("/uploads/multipart", {
+      filename: file.name,
+      content_type: file.type || "application/octet-stream",
+      size: file.size,
+    });
+    const completed = new Array(session.parts.length);
+    let next = 0;
+
+    async function uploadParts() {
+      while (next < session.parts.length) {
+        const index = next++;
+        const part = session.parts[index];
+        const start = index * session.part_size;
+        const response = await fetch(part.url, {
+          method: "PUT",
+          body: file.slice(start, start + session.part_size),
+        });
+        if (!response.ok) {
+          throw new Error(`part ${part.part_number} returned ${response.status}`);
+        }
+        // Requires the bucket CORS rule to expose the ETag header.
+        completed[index] = { PartNumber: part.part_number, ETag: response.headers.get("ETag") };
+      }
+    }
+
+    const reference = { file_id: session.file_id, filename: file.name, upload_id: session.upload_id };
+    try {
+      const workers = Math.min(MAX_CONCURRENT_PARTS, session.parts.length);
+      await Promise.all(Array.from({ length: workers }, uploadParts));
+    } catch (error) {
+      await postJson("/uploads/multipart/abort", reference);
+      throw error;
+    }
+    return postJson("/uploads/multipart/complete", { ...reference, parts: completed });
+  }
+
+  // Every selected file is uploaded, a few at a time; the whole selection is
+  // handed to Dash as one batch once all uploads have finished.
+  async function uploadFiles(files) {
+    const results = [];
+    let next = 0;
+    async function uploadNext() {
+      while (next < files.length) {
+        const file = files[next++];
+        setProps("upload-status", { children: `Uploading ${file.name} (${results.length}/${files.length} done)...` });
+        results.push(await uploadFile(file));
+      }
+    }
+    const workers = Math.min(MAX_CONCURRENT_FILES, files.length);
+    await Promise.all(Array.from({ length: workers }, uploadNext));
+    return results;
+  }
+
+  function startUpload(files) {
+    if (!files || !files.length) {
+      return;
+    }
+    uploadFiles(Array.from(files))
+      .then(function (results) {
+        setProps("uploads-store", { data: results });
+        setProps("upload-status", { children: `Uploaded ${results.length} files` });
+      })
+      .catch(function (error) {
+        setProps("upload-status", { children: `Upload failed: ${error.message}` });
+      });
+  }
+
+  function uploadTarget(event) {
+    return event.target instanceof Element ? event.target.closest("#file-upload") : null;
+  }
+
+  // Dash renders the layout after this script runs, so events are delegated
+  // from the document instead of being bound to the upload area directly.
+  document.addEventListener("click", function (event) {
+    if (!uploadTarget(event)) {
+      return;
+    }
+    const picker = document.createElement("input");
+    picker.type = "file";
+    picker.multiple = true;
+    picker.addEventListener("change", function () {
+      startUpload(picker.files);
+    });
+    picker.click();
+  });
+
+  document.addEventListener("dragover", function (event) {
+    if (uploadTarget(event)) {
+      event.preventDefault();
+    }
+  });
+
+  document.addEventListener("drop", function (event) {
+    if (!uploadTarget(event)) {
+      return;
+    }
+    event.preventDefault();
+    startUpload(event.dataTransfer.files);
+  });
+})();
@@ -8,11 +8,17 @@ class AppConfig:
     aws_region: str = "eu-central-1"
     s3_bucket: str = "erp-genai-poc"
     s3_prefix: str = ""
+    s3_endpoint_url: str | None = None
+
+    aws_max_pool_connections: int = 32
+    aws_max_attempts: int = 5
+    aws_retry_mode: str = "standard"
 
     inputs_prefix: str = "inputs/raw"
     outputs_prefix: str = "outputs"
     logs_prefix: str = "logs"
     system_errors_prefix: str = "system/errors"
+    cache_prefix: str = "cache"
 
     house: str = "GUESS"
     collection_category: str = "GUESS APPAREL"
@@ -27,5 +33,60 @@ class AppConfig:
 
     lifecycle_days: int = 30
 
+    log_write_behind: bool = True
+    log_queue_size: int = 10_000
+    log_flush_records: int = 500
+    log_flush_interval_seconds: float = 2.0
+    log_put_timeout_seconds: float = 1.0
+    log_max_retained_records: int = 10_000
+    log_close_attempts: int = 5
+    log_close_backoff_seconds: float = 0.5
+    audit_compaction_lag_seconds: float = 300.0
+    audit_read_workers: int = 8
+    audit_batch_records: int = 50_000
+
+    upload_part_size: int = 16 * 1024 * 1024
+    upload_max_concurrency: int = 4
+    download_part_size: int = 8 * 1024 * 1024
+    download_max_concurrency: int = 4
+    download_spool_max_memory: int = 64 * 1024 * 1024
+
+    bedrock_endpoint_url: str | None = None
+    bedrock_max_concurrency: int = 4
+    bedrock_requests_per_second: float = 5.0
+    bedrock_max_attempts: int = 6
+    bedrock_backoff_base_seconds: float = 0.5
+    bedrock_backoff_max_seconds: float = 20.0
+
+    bedrock_cache_backend: str = "s3"
+    bedrock_cache_dir: str = "/tmp/erp-etl/bedrock-cache"
+    bedrock_cache_entries: int = 1024
+    bedrock_cache_ttl_seconds: float = 3600.0
+    bedrock_cache_persistent_ttl_seconds: float = 30 * 24 * 3600.0
+
+    ingest_chunk_rows: int = 50_000
+    parsed_cache_dir: str = "/tmp/erp-etl/parsed"
+    parsed_cache_max_bytes: int = 2 * 1024**3
+
+    output_write_workers: int = 4
+    xlsx_block_rows: int = 10_000
+
+    job_db_path: str = "/tmp/erp-etl/jobs.sqlite3"
+    job_workers: int = 2
+    job_poll_interval_ms: int = 1000
+    job_defer_seconds: float = 2.0
+    job_max_attempts: int = 3
+    job_heartbeat_seconds: float = 5.0
+    job_stale_seconds: float = 60.0
+    job_lock_ttl_seconds: float = 3600.0
+
+    item_master_settle_seconds: float = 300.0
+    item_master_cache_workflows: int = 8
+
+    metrics_dir: str = "/tmp/erp-etl/metrics"
+
+    preview_cache_max_bytes: int = 1024**3
+    preview_page_size: int = 50
+
 
 CONFIG = AppConfig()
@@ -2,115 +2,298 @@
 
 from __future__ import annotations
 
-import base64
 import uuid
 from datetime import datetime, timezone
 
 import dash
-from dash import Dash, Input, Output, State, dcc, html
+from dash import Dash, Input, Output, State, dash_table, dcc, html
+from flask import Response, jsonify, request
 
 from app.config.settings import CONFIG
+from app.jobs.queue import COMPLETED, FAILED, JobQueue
+from app.jobs.runner import JobRunner
 from app.logging.ai_logger import AILogger, AILog
 from app.logging.file_logger import FileLog, FileLogger
+from app.logging.metrics import METRICS
+from app.logging.s3_logger import S3Logger
 from app.logging.workflow_logger import WorkflowLog, WorkflowLogger
+from app.services.preview_service import INPUT, PreviewService
 from app.services.s3_service import S3Service
 from app.services.signed_url_service import SignedUrlService
-from app.utils.hash_utils import stable_hash
 
 
 app: Dash = dash.Dash(__name__)
 s3_service = S3Service()
-file_logger = FileLogger()
-workflow_logger = WorkflowLogger()
-ai_logger = AILogger()
+s3_logger = S3Logger(s3_service)
+file_logger = FileLogger(s3_logger)
+workflow_logger = WorkflowLogger(s3_logger)
+ai_logger = AILogger(s3_logger)
 signed_url_service = SignedUrlService(s3_service)
+preview_service = PreviewService()
+job_queue = JobQueue()
+job_runner = JobRunner(job_queue)
 
 
 app.layout = html.Div(
     [
         html.H1("ERP GenAI ETL POC"),
-        dcc.Upload(
+        # Files go straight from the browser to S3 as presigned multipart
+        # parts (see assets/direct_upload.js); only the resulting file_ids
+        # reach the Dash callbacks.
+        html.Div(
             id="file-upload",
-            children=html.Div(["Drag and Drop or ", html.A("Select File")]),
-            multiple=False,
+            children=html.Div(["Drag and Drop or ", html.A("Select Files")]),
         ),
         html.Div(id="upload-status"),
         html.Div(id="file-type"),
-        html.Div(id="mapping-preview"),
+        # Only the visible page of a parsed or transformed frame is sent to
+        # the browser; paging, sorting and filtering run on the server.
+        html.Div(
+            id="mapping-preview",
+            children=[
+                dcc.Dropdown(id="preview-file", placeholder="Preview file"),
+                dcc.Dropdown(id="preview-output", placeholder="Preview output"),
+                html.Div(id="preview-status"),
+                dash_table.DataTable(
+                    id="preview-table",
+                    page_action="custom",
+                    page_current=0,
+                    page_size=CONFIG.preview_page_size,
+                    sort_action="custom",
+                    sort_mode="multi",
+                    sort_by=[],
+                    filter_action="custom",
+                    filter_query="",
+                ),
+            ],
+        ),
         html.Div(id="processing-status"),
+        html.Div(id="job-progress"),
         html.Div(id="download-links"),
-        dcc.Store(id="file-id-store"),
+        # One entry per uploaded file: file_id, filename.
+        dcc.Store(id="uploads-store"),
+        dcc.Store(id="workflow-id-store"),
+        dcc.Store(id="job-status-store"),
+        # Polls the job queue while a workflow is running.
+        dcc.Interval(id="job-poll", interval=CONFIG.job_poll_interval_ms, disabled=True),
     ]
 )
 
 
-@app.callback(
-    Output("upload-status", "children"),
-    Output("file-id-store", "data"),
-    Input("file-upload", "contents"),
-    State("file-upload", "filename"),
-    prevent_initial_call=True,
-)
-def handle_upload(contents: str | None, filename: str | None) -> tuple[str, str | None]:
-    if not contents or not filename:
-        return "No file uploaded.", None
+@app.server.route("/uploads/multipart", methods=["POST"])
+def start_multipart_upload():
+    body = request.get_json(force=True)
     file_id = str(uuid.uuid4())
-    content_type, content_string = contents.split(",", maxsplit=1)
-    raw_bytes = base64.b64decode(content_string)
-    key = f"{CONFIG.inputs_prefix}/{file_id}/{filename}"
-    s3_service.put_bytes(key, raw_bytes, content_type)
+    session = signed_url_service.create_multipart_upload(
+        file_id=file_id,
+        filename=body["filename"],
+        content_type=body.get("content_type") or "application/octet-stream",
+        size=int(body["size"]),
+    )
+    return jsonify(session)
 
-    file_log = FileLog(file_id=file_id, original_filename=filename)
-    file_logger.write(file_log)
 
-    return f"Uploaded {filename} with file_id={file_id}", file_id
+@app.server.route("/uploads/multipart/complete", methods=["POST"])
+def complete_multipart_upload():
+    body = request.get_json(force=True)
+    file_id = body["file_id"]
+    filename = body["filename"]
+    signed_url_service.complete_multipart_upload(file_id, filename, body["upload_id"], body["parts"])
+    # Hashing and dedupe happen in the job's download step, which reads the
+    # bytes anyway; this route stays O(1) in the upload size.
+    file_logger.write(FileLog(file_id=file_id, original_filename=filename))
+    return jsonify({"file_id": file_id, "filename": filename})
+
+
+@app.server.route("/metrics")
+def metrics():
+    # This process's registry merged with the snapshots written by job workers.
+    return Response(METRICS.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.server.route("/uploads/multipart/abort", methods=["POST"])
+def abort_multipart_upload():
+    body = request.get_json(force=True)
+    signed_url_service.abort_multipart_upload(body["file_id"], body["filename"], body["upload_id"])
+    return jsonify({"aborted": True})
 
 
 @app.callback(
     Output("processing-status", "children"),
-    Input("file-id-store", "data"),
-    State("file-upload", "filename"),
+    Output("workflow-id-store", "data"),
+    Output("job-poll", "disabled"),
+    Output("job-status-store", "data", allow_duplicate=True),
+    Input("uploads-store", "data"),
     prevent_initial_call=True,
 )
-def start_workflow(file_id: str | None, filename: str | None) -> str:
-    if not file_id or not filename:
-        return "No workflow started."
+def start_workflow(uploads: list[dict] | None) -> tuple[str, str | None, bool, list]:
+    if not uploads:
+        return "No workflow started.", None, True, []
     workflow_id = str(uuid.uuid4())
-    workflow_log = WorkflowLog(workflow_id=workflow_id, file_ids=[file_id])
-    workflow_log.add_step("upload", "completed")
+    workflow_log = WorkflowLog(workflow_id=workflow_id, file_ids=[upload["file_id"] for upload in uploads])
+    workflow_log.add_step("upload", "completed", metrics={"files": len(uploads)})
+    workflow_log.add_step("enqueue", "completed", metrics={"jobs": len(uploads)})
     workflow_logger.write(workflow_log)
-    return f"Workflow {workflow_id} started at {datetime.now(timezone.utc).isoformat()}"
+    # Processing runs in worker processes; this callback only enqueues one
+    # job per file and the queue spreads them over the workers.
+    for upload in uploads:
+        job_queue.enqueue(workflow_id, "file", {"file_id": upload["file_id"], "filename": upload["filename"]})
+    job_runner.start()
+    job_runner.notify()
+    queued_at = datetime.now(timezone.utc).isoformat()
+    return f"Workflow {workflow_id} queued {len(uploads)} files at {queued_at}", workflow_id, False, []
+
+
+@app.callback(
+    Output("job-status-store", "data"),
+    Output("job-poll", "disabled", allow_duplicate=True),
+    Input("job-poll", "n_intervals"),
+    State("workflow-id-store", "data"),
+    prevent_initial_call=True,
+)
+def poll_jobs(_: int, workflow_id: str | None) -> tuple[list[dict], bool]:
+    if not workflow_id:
+        return [], True
+    jobs = [job.to_payload() for job in job_queue.jobs_for_workflow(workflow_id)]
+    finished = all(job["status"] in (COMPLETED, FAILED) for job in jobs)
+    return jobs, finished
+
+
+@app.callback(
+    Output("job-progress", "children"),
+    Input("job-status-store", "data"),
+    prevent_initial_call=True,
+)
+def show_job_progress(jobs: list[dict] | None) -> list[html.Div]:
+    views = []
+    for job in jobs or []:
+        steps = [
+            html.Li(f"{step['name']}: {step['status']} ({step['duration_seconds'] or 0:.1f}s)")
+            for step in job["progress"].get("steps", [])
+        ]
+        if job["current_step"]:
+            steps.append(html.Li(f"{job['current_step']}: running"))
+        status = job["status"] if not job["error"] else f"{job['status']}: {job['error']}"
+        views.append(html.Div([html.Strong(f"{job['payload']['filename']} - {status}"), html.Ul(steps)]))
+    return views
 
 
 @app.callback(
     Output("download-links", "children"),
-    Input("file-id-store", "data"),
+    Input("job-status-store", "data"),
     prevent_initial_call=True,
 )
-def show_download_links(file_id: str | None) -> list[html.Li]:
-    if not file_id:
-        return []
-    outputs_prefix = f"{CONFIG.outputs_prefix}/{file_id}"
-    keys = [
-        f"{outputs_prefix}/file_a.xlsx",
-        f"{outputs_prefix}/file_b.xlsx",
-        f"{outputs_prefix}/file_c.xlsx",
-        f"{outputs_prefix}/cancellations.xlsx",
-    ]
+def show_download_links(jobs: list[dict] | None) -> list[html.Li]:
+    outputs = []
+    for job in jobs or []:
+        if job["status"] == COMPLETED:
+            outputs.append((job["payload"]["filename"], job["result"].get("output_paths", [])))
     links = []
-    for key in keys:
-        url = signed_url_service.create_download_url(key)
-        links.append(html.Li(html.A(key.split("/")[-1], href=url)))
+    for filename, keys in outputs:
+        for key in keys:
+            url = signed_url_service.create_download_url(key)
+            links.append(html.Li(html.A(f"{filename}: {key.split('/')[-1]}", href=url)))
     return links
 
 
-def log_ai_decision(file_id: str, agent_name: str, model_name: str, prompt: dict, output: dict, confidence: float) -> None:
-    payload = {
-        "agent": agent_name,
-        "model": model_name,
-        "input_snapshot": prompt.get("input_snapshot", {}),
-        "output": output,
-    }
+@app.callback(
+    Output("preview-file", "options"),
+    Input("job-status-store", "data"),
+    prevent_initial_call=True,
+)
+def preview_files(jobs: list[dict] | None) -> list[dict]:
+    # A file can be previewed once its type is known and it has been parsed;
+    # a deduplicated re-upload reuses outputs and is never parsed.
+    return [
+        {"label": job["payload"]["filename"], "value": job["payload"]["file_id"]}
+        for job in jobs or []
+        if job["file_type"] and not job["result"].get("cached")
+    ]
+
+
+@app.callback(
+    Output("preview-output", "options"),
+    Output("preview-output", "value"),
+    Input("preview-file", "value"),
+    State("job-status-store", "data"),
+    prevent_initial_call=True,
+)
+def preview_outputs(file_id: str | None, jobs: list[dict] | None) -> tuple[list[str], str | None]:
+    file_type = _file_type(jobs, file_id)
+    if file_type is None:
+        return [], None
+    return preview_service.outputs(file_type), INPUT
+
+
+@app.callback(
+    Output("preview-table", "page_current"),
+    Output("preview-table", "sort_by"),
+    Output("preview-table", "filter_query"),
+    Input("preview-file", "value"),
+    Input("preview-output", "value"),
+    prevent_initial_call=True,
+)
+def reset_preview(_: str | None, __: str | None) -> tuple[int, list, str]:
+    return 0, [], ""
+
+
+@app.callback(
+    Output("preview-table", "data"),
+    Output("preview-table", "columns"),
+    Output("preview-table", "page_count"),
+    Output("preview-status", "children"),
+    Input("preview-file", "value"),
+    Input("preview-output", "value"),
+    Input("preview-table", "page_current"),
+    Input("preview-table", "page_size"),
+    Input("preview-table", "sort_by"),
+    Input("preview-table", "filter_query"),
+    State("job-status-store", "data"),
+    prevent_initial_call=True,
+)
+def show_preview(
+    file_id: str | None,
+    output: str | None,
+    page_current: int | None,
+    page_size: int | None,
+    sort_by: list[dict] | None,
+    filter_query: str | None,
+    jobs: list[dict] | None,
+) -> tuple[list[dict], list[dict], int, str]:
+    file_type = _file_type(jobs, file_id)
+    if file_type is None or not output:
+        return [], [], 1, ""
+    page = preview_service.page(
+        file_id,
+        file_type,
+        output,
+        page_current=page_current or 0,
+        page_size=page_size or CONFIG.preview_page_size,
+        sort_by=sort_by,
+        filter_query=filter_query,
+    )
+    if page is None:
+        return [], [], 1, "Not parsed yet."
+    columns = [{"name": name, "id": name} for name in page.columns]
+    return page.records, columns, page.page_count, f"{page.matching_rows:,} of {page.total_rows:,} rows"
+
+
+def _file_type(jobs: list[dict] | None, file_id: str | None) -> str | None:
+    for job in jobs or []:
+        if job["payload"]["file_id"] == file_id:
+            return job["file_type"]
+    return None
+
+
+def log_ai_decision(
+    file_id: str,
+    agent_name: str,
+    model_name: str,
+    prompt: dict,
+    output: dict,
+    confidence: float,
+    cache_status: str | None = None,
+) -> None:
     validation_result = "valid" if output else "invalid"
     ai_log = AILog(
         file_id=file_id,
@@ -121,9 +304,9 @@ def log_ai_decision(file_id: str, agent_name: str, model_name: str, prompt: dict
         output=output,
         confidence=confidence,
         validation_result=validation_result,
+        cache_status=cache_status,
     )
     ai_logger.write(ai_log)
-    stable_hash(payload)
 
 
 if __name__ == "__main__":
@@ -1,15 +1,23 @@
 """Cancellation logic for change files."""
 
+from typing import Iterable, Iterator
+
 import pandas as pd
 
 from app.config.settings import CONFIG
+from app.engine.transformer import constant_column
 
 
 def build_cancellation_file(df: pd.DataFrame) -> pd.DataFrame:
     output = pd.DataFrame()
     output["Supplier Item Code"] = df["Col F"]
     output["Color Code"] = CONFIG.color_prefix + "/" + df["Col G"].astype(str)
-    output["Pricelist Season"] = CONFIG.pricelist_season
-    output["Collection Code"] = CONFIG.collection_code
-    output["House"] = CONFIG.house
+    output["Pricelist Season"] = constant_column(CONFIG.pricelist_season, df.index)
+    output["Collection Code"] = constant_column(CONFIG.collection_code, df.index)
+    output["House"] = constant_column(CONFIG.house, df.index)
     return output
+
+
+def iter_cancellation_files(chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    for chunk in chunks:
+        yield build_cancellation_file(chunk)
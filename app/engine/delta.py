@@ -0,0 +1,125 @@
+"""Incremental processing of collection change files against a row-hash index."""
+
+from __future__ import annotations
+
+import io
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.config.settings import CONFIG
+from app.engine.transformer import TransformationResult, Transformer
+from app.logging.metrics import span
+from app.logging.workflow_logger import WorkflowLog
+from app.services.s3_service import PARQUET_CONTENT_TYPE, S3Service
+
+
+KEY_COLUMNS = ["Col F", "Col G"]
+CANCELLED_STATUS = "ΑΚΥΡΟ"
+
+
+@dataclass
+class DeltaStats:
+    total_rows: int = 0
+    added: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    newly_cancelled: int = 0
+    forwarded: int = 0
+
+    def to_payload(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class ChangeDelta:
+    rows: pd.DataFrame
+    index: pd.DataFrame
+    stats: DeltaStats
+
+
+def build_row_index(df: pd.DataFrame) -> pd.DataFrame:
+    """One entry per change-file row: key, occurrence of that key, row hash, cancelled flag.
+
+    The occurrence number keeps repeated (Col F, Col G) keys apart so the
+    diff stays a one-to-one join.
+    """
+    keys = df[KEY_COLUMNS].astype(str).reset_index(drop=True)
+    hashed = df[sorted(df.columns, key=str)]
+    status = df["Status"] if "Status" in df.columns else pd.Series(None, index=df.index, dtype=object)
+    index = keys.assign(
+        occurrence=keys.groupby(KEY_COLUMNS, sort=False).cumcount().to_numpy(),
+        row_hash=pd.util.hash_pandas_object(hashed, index=False).to_numpy(),
+        cancelled=(status == CANCELLED_STATUS).to_numpy(),
+    )
+    return index
+
+
+def compute_delta(df: pd.DataFrame, previous: pd.DataFrame | None) -> ChangeDelta:
+    index = build_row_index(df)
+    stats = DeltaStats(total_rows=len(df))
+    if previous is None or previous.empty:
+        selected = np.ones(len(df), dtype=bool)
+        stats.added = len(df)
+        stats.newly_cancelled = int(index["cancelled"].sum())
+    else:
+        merged = index.merge(
+            previous,
+            on=[*KEY_COLUMNS, "occurrence"],
+            how="left",
+            suffixes=("", "_previous"),
+            indicator=True,
+            validate="one_to_one",
+        )
+        added = (merged["_merge"] == "left_only").to_numpy()
+        changed = ~added & (merged["row_hash"] != merged["row_hash_previous"]).to_numpy()
+        was_cancelled = merged["cancelled_previous"].eq(True).to_numpy()
+        newly_cancelled = merged["cancelled"].to_numpy() & ~was_cancelled
+        selected = added | changed | newly_cancelled
+        stats.added = int(added.sum())
+        stats.changed = int(changed.sum())
+        stats.unchanged = int((~added & ~changed).sum())
+        stats.removed = len(previous) - int((~added).sum())
+        stats.newly_cancelled = int(newly_cancelled.sum())
+    stats.forwarded = int(selected.sum())
+    return ChangeDelta(rows=df[selected], index=index, stats=stats)
+
+
+class RowIndexStore:
+    def __init__(self, s3_service: S3Service | None = None) -> None:
+        self.s3_service = s3_service or S3Service()
+
+    def load(self, supplier: str) -> pd.DataFrame | None:
+        body = self.s3_service.get_bytes_or_none(self._key(supplier))
+        return pd.read_parquet(io.BytesIO(body)) if body is not None else None
+
+    def save(self, supplier: str, index: pd.DataFrame) -> None:
+        buffer = io.BytesIO()
+        index.to_parquet(buffer, index=False)
+        self.s3_service.put_bytes(self._key(supplier), buffer.getvalue(), PARQUET_CONTENT_TYPE)
+
+    def _key(self, supplier: str) -> str:
+        return f"{CONFIG.cache_prefix}/row_index/{supplier}.parquet"
+
+
+def process_change_file(
+    df: pd.DataFrame,
+    transformer: Transformer | None = None,
+    store: RowIndexStore | None = None,
+    supplier: str = CONFIG.basic_supplier_code,
+    workflow_log: WorkflowLog | None = None,
+) -> Tuple[TransformationResult, ChangeDelta]:
+    """Transform only the rows that are new, changed or newly cancelled since the last file.
+
+    The row index is not updated here: save ``delta.index`` once the outputs
+    are written, so a failed or retried run diffs against the same index.
+    """
+    transformer = transformer or Transformer()
+    store = store or RowIndexStore()
+    with span("delta", workflow_log) as current:
+        delta = compute_delta(df, store.load(supplier))
+        current.metrics.update(delta.stats.to_payload(), rows=len(df))
+    return transformer.transform_changes(delta.rows), delta
@@ -0,0 +1,251 @@
+"""Projected, dtype-controlled ingestion of supplier workbooks and CSV files.
+
+Supplier columns are addressed by their spreadsheet letter ("Col D", "Col AJ")
+as the transformer expects; a few columns are addressed by header text
+("Status", "Customer Code"). Only the columns used by the requested outputs
+are read.
+"""
+
+from __future__ import annotations
+
+import os
+import resource
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils import column_index_from_string
+
+from app.config.settings import CONFIG
+
+
+OUTPUT_COLUMNS: Dict[str, List[str]] = {
+    "file_a": [
+        "Col D", "Col I", "Col L", "Col M", "Col R", "Col T", "Col V",
+        "Col AD", "Col AG", "Col AI", "Col AJ",
+    ],
+    "file_b": ["Col D", "Col J", "Col K", "Col N", "Col O"],
+    "file_c": ["Col D", "Col J", "Col N", "Col O", "Col P", "Col Q"],
+    "cancellations": ["Col F", "Col G", "Status"],
+    "order_confirmations": [
+        "Col H", "Col J", "Col K", "Col O", "Col Q", "Col AD", "Col AH",
+        "Supplier Customer Code", "Customer Code",
+    ],
+}
+
+FILE_TYPE_OUTPUTS: Dict[str, Tuple[str, ...]] = {
+    "COLLECTION_ITEMS": ("file_a", "file_b", "file_c"),
+    "COLLECTION_CHANGES": ("cancellations",),
+    "ORDER_CONFIRMATIONS": ("order_confirmations",),
+}
+
+# Low-cardinality fields; everything else stays object so values reach the
+# transformer exactly as the workbook stores them.
+CATEGORICAL_COLUMNS = {"Col L", "Col N", "Col V"}
+
+
+@dataclass
+class IngestionReport:
+    path: str
+    file_type: str
+    columns: List[str]
+    rows: int
+    seconds: float
+    rows_per_second: float
+    # ru_maxrss: the peak of the whole process so far, not of this file.
+    process_peak_rss_bytes: int
+    peak_traced_bytes: int | None = None
+
+    def to_payload(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def projection(outputs: Iterable[str]) -> List[str]:
+    columns: List[str] = []
+    for output in outputs:
+        for column in OUTPUT_COLUMNS[output]:
+            if column not in columns:
+                columns.append(column)
+    return columns
+
+
+def column_positions(header: Sequence[Any], columns: Sequence[str]) -> Dict[str, int]:
+    """Resolve "Col <letter>" names by position and other names by header text."""
+    positions: Dict[str, int] = {}
+    labels = [str(value).strip() if value is not None else "" for value in header]
+    for column in columns:
+        if column.startswith("Col ") and column[4:].isalpha() and column[4:].isupper():
+            positions[column] = column_index_from_string(column[4:]) - 1
+        elif column in labels:
+            positions[column] = labels.index(column)
+    return positions
+
+
+def read_header(path: str, sheet_name: str | None = None) -> List[Any]:
+    if os.path.splitext(path)[1].lower() == ".csv":
+        return list(pd.read_csv(path, nrows=0).columns)
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.active
+        return list(next(sheet.iter_rows(values_only=True), ()))
+    finally:
+        workbook.close()
+
+
+def detect_file_type(header: Sequence[Any]) -> str:
+    """Guess the supplier file type from its header row."""
+    labels = {str(value).strip() for value in header if value is not None}
+    if "Status" in labels:
+        return "COLLECTION_CHANGES"
+    if labels & {"Supplier Customer Code", "Customer Code"}:
+        return "ORDER_CONFIRMATIONS"
+    return "COLLECTION_ITEMS"
+
+
+def apply_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    for column in df.columns:
+        if column in CATEGORICAL_COLUMNS:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def iter_input_chunks(
+    path: str,
+    file_type: str,
+    chunk_rows: int = CONFIG.ingest_chunk_rows,
+    outputs: Sequence[str] | None = None,
+    sheet_name: str | None = None,
+) -> Iterator[pd.DataFrame]:
+    """Yield projected row chunks; categories are per chunk."""
+    for chunk in _iter_raw_chunks(path, file_type, chunk_rows, outputs, sheet_name):
+        yield apply_dtypes(chunk)
+
+
+def read_input(
+    path: str,
+    file_type: str,
+    outputs: Sequence[str] | None = None,
+    sheet_name: str | None = None,
+    trace_memory: bool = False,
+) -> Tuple[pd.DataFrame, IngestionReport]:
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        chunks = list(_iter_raw_chunks(path, file_type, CONFIG.ingest_chunk_rows, outputs, sheet_name))
+        columns = projection(outputs or FILE_TYPE_OUTPUTS[file_type])
+        if chunks:
+            df = pd.concat(chunks, ignore_index=True)
+        else:
+            df = pd.DataFrame(columns=columns, dtype=object)
+        df = apply_dtypes(df)
+        seconds = time.perf_counter() - started
+        traced = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    report = IngestionReport(
+        path=path,
+        file_type=file_type,
+        columns=list(df.columns),
+        rows=len(df),
+        seconds=seconds,
+        rows_per_second=len(df) / seconds if seconds else 0.0,
+        # ru_maxrss is reported in KiB on Linux.
+        process_peak_rss_bytes=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        peak_traced_bytes=traced,
+    )
+    return df, report
+
+
+def _iter_raw_chunks(
+    path: str,
+    file_type: str,
+    chunk_rows: int,
+    outputs: Sequence[str] | None,
+    sheet_name: str | None,
+) -> Iterator[pd.DataFrame]:
+    columns = projection(outputs or FILE_TYPE_OUTPUTS[file_type])
+    if os.path.splitext(path)[1].lower() == ".csv":
+        return _iter_csv_chunks(path, columns, chunk_rows)
+    return _iter_workbook_chunks(path, columns, chunk_rows, sheet_name)
+
+
+def _iter_workbook_chunks(
+    path: str,
+    columns: List[str],
+    chunk_rows: int,
+    sheet_name: str | None,
+) -> Iterator[pd.DataFrame]:
+    # read_only streams rows from the sheet XML instead of building the whole
+    # workbook object model.
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, ())
+        positions = column_positions(header, columns)
+        selected = [column for column in columns if column in positions]
+        indexes = [positions[column] for column in selected]
+        buffer: Dict[str, List[Any]] = {column: [] for column in selected}
+        buffered = 0
+        offset = 0
+        for row in rows:
+            values = [row[index] if index < len(row) else None for index in indexes]
+            if all(value is None for value in values):
+                continue
+            for column, value in zip(selected, values):
+                buffer[column].append(value)
+            buffered += 1
+            if buffered >= chunk_rows:
+                yield _buffer_frame(buffer, selected, offset)
+                buffer = {column: [] for column in selected}
+                offset += buffered
+                buffered = 0
+        if buffered:
+            yield _buffer_frame(buffer, selected, offset)
+    finally:
+        workbook.close()
+
+
+def _buffer_frame(buffer: Dict[str, List[Any]], columns: List[str], offset: int) -> pd.DataFrame:
+    # Chunks carry a running RangeIndex so streamed outputs concatenate cleanly.
+    index = pd.RangeIndex(offset, offset + len(buffer[columns[0]]) if columns else offset)
+    return pd.DataFrame(buffer, columns=columns, index=index, dtype=object)
+
+
+def _iter_csv_chunks(path: str, columns: List[str], chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Chunks shaped like ``_iter_workbook_chunks``: missing columns and empty cells are None,
+    blank rows are skipped and the index runs on across chunks."""
+    header = pd.read_csv(path, nrows=0).columns
+    positions = column_positions(header, columns)
+    selected = [column for column in columns if column in positions]
+    # "Col" names past the last column of a narrower file are padded, not read.
+    usecols = sorted({position for position in positions.values() if position < len(header)})
+    if not usecols:
+        return
+    reader = pd.read_csv(
+        path,
+        header=None,
+        skiprows=1,
+        usecols=usecols,
+        dtype=object,
+        chunksize=chunk_rows,
+    )
+    offset = 0
+    for chunk in reader:
+        # A header-named column may share its position with a "Col" name.
+        frame = pd.DataFrame(
+            {column: chunk[positions[column]] if positions[column] in chunk.columns else None for column in selected},
+            columns=selected,
+            index=chunk.index,
+            dtype=object,
+        )
+        frame = frame[frame.notna().any(axis=1)]
+        frame = frame.where(frame.notna(), None)
+        frame.index = pd.RangeIndex(offset, offset + len(frame))
+        offset += len(frame)
+        yield frame
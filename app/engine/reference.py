@@ -0,0 +1,251 @@
+"""Reference data shared across files: the item master of everything sent to the ERP."""
+
+from __future__ import annotations
+
+import io
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.config.settings import CONFIG
+from app.services.s3_service import PARQUET_CONTENT_TYPE, S3Service
+
+
+ITEM_MASTER_KEY = ["Supplier Item Code", "Color Code", "Size"]
+ITEM_MASTER_COLUMNS = ITEM_MASTER_KEY + ["Size Code", "English Description", "Barcode"]
+# Schema metadata of the merged master: how far the merge of entries got.
+_STATE_METADATA_KEY = b"erp_etl.item_master"
+_STAMP_FORMAT = "%Y%m%d%H%M%S%f"
+# Joins the key columns into one lookup string; never part of a supplier code.
+_KEY_SEPARATOR = "\x1f"
+
+
+def _key_strings(item: pd.Series, color: pd.Series, size: pd.Series) -> np.ndarray:
+    return (
+        item.astype(str).to_numpy(dtype=object)
+        + _KEY_SEPARATOR
+        + color.astype(str).to_numpy(dtype=object)
+        + _KEY_SEPARATOR
+        + size.astype(str).to_numpy(dtype=object)
+    )
+
+
+def item_master_entries(df: pd.DataFrame, outputs: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Distinct variants of an items file, taken from its file A/B/C outputs.
+
+    File B holds one row per variant and shares its index with the input, so
+    the supplier size (Col O, which order confirmations carry) is taken from
+    ``df``. The description comes from file A and the barcode from file C,
+    preferring the EAN-13.
+    """
+    file_b = outputs["file_b"]
+    entries = pd.DataFrame(
+        {
+            "Supplier Item Code": file_b["Supplier Item Code"].astype(str).to_numpy(dtype=object),
+            "Color Code": file_b["Color Code"].astype(str).to_numpy(dtype=object),
+            "Size": df.loc[file_b.index, "Col O"].astype(str).to_numpy(dtype=object),
+            "Size Code": file_b["Size Code"].astype(str).to_numpy(dtype=object),
+            "English Description": outputs["file_a"].loc[file_b.index, "English Description"].to_numpy(dtype=object),
+        }
+    )
+    entries = entries.drop_duplicates(subset=ITEM_MASTER_KEY, ignore_index=True)
+    file_c = outputs.get("file_c")
+    if file_c is None or file_c.empty:
+        entries["Barcode"] = None
+        return entries[ITEM_MASTER_COLUMNS]
+    barcodes = pd.DataFrame(
+        {
+            "Supplier Item Code": file_c["Supplier Item Code"].astype(str).to_numpy(dtype=object),
+            "Color Code": file_c["Color Code"].astype(str).to_numpy(dtype=object),
+            "Size Code": file_c["Size Code"].astype(str).to_numpy(dtype=object),
+            "Barcode": file_c["Barcode"].astype(str).to_numpy(dtype=object),
+            "Barcode Type": file_c["Barcode Type"].astype(str).to_numpy(dtype=object),
+        }
+    )
+    barcodes = barcodes.sort_values("Barcode Type", kind="stable").drop_duplicates(
+        subset=["Supplier Item Code", "Color Code", "Size Code"]
+    )
+    entries = entries.merge(
+        barcodes.drop(columns="Barcode Type"),
+        on=["Supplier Item Code", "Color Code", "Size Code"],
+        how="left",
+    )
+    return entries[ITEM_MASTER_COLUMNS]
+
+
+@dataclass
+class OrderLineCheck:
+    """Item-master match of each order-confirmation line, in line order."""
+
+    positions: np.ndarray
+    enriched: pd.DataFrame
+
+    @property
+    def known(self) -> np.ndarray:
+        return self.positions >= 0
+
+    @property
+    def unknown_count(self) -> int:
+        return int((self.positions < 0).sum())
+
+    def unknown_keys(self, limit: int = 20) -> List[str]:
+        unknown = self.enriched.loc[~self.known, ITEM_MASTER_KEY].drop_duplicates().head(limit)
+        return [" / ".join(values) for values in unknown.itertuples(index=False)]
+
+
+class ItemMasterIndex:
+    """Item-master entries sorted by (Supplier Item Code, Color Code, Size).
+
+    Lookups join a whole batch at once through a hash index over the joined
+    key strings, built on first use.
+    """
+
+    def __init__(self, entries: pd.DataFrame) -> None:
+        entries = entries.drop_duplicates(subset=ITEM_MASTER_KEY, keep="last")
+        self.entries = entries.sort_values(ITEM_MASTER_KEY, kind="stable", ignore_index=True)[ITEM_MASTER_COLUMNS]
+        self._index: pd.Index | None = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def lookup(self, item: pd.Series, color: pd.Series, size: pd.Series) -> np.ndarray:
+        """Entry position of each (item, color, size), or -1 when it is not in the index."""
+        if self._index is None:
+            self._index = pd.Index(
+                _key_strings(self.entries["Supplier Item Code"], self.entries["Color Code"], self.entries["Size"])
+            )
+        return self._index.get_indexer(_key_strings(item, color, size))
+
+    def check_order_lines(self, df: pd.DataFrame) -> OrderLineCheck:
+        """Match order-confirmation lines (item in Col J, color in Col K, size in Col O).
+
+        ``enriched`` holds the line keys and, for known lines, the ERP size
+        code, description and barcode sent with the items.
+        """
+        item, color, size = df["Col J"].astype(str), df["Col K"].astype(str), df["Col O"].astype(str)
+        positions = self.lookup(item, color, size)
+        found = positions >= 0
+        enriched = pd.DataFrame(
+            {
+                "Supplier Item Code": item.to_numpy(dtype=object),
+                "Color Code": color.to_numpy(dtype=object),
+                "Size": size.to_numpy(dtype=object),
+            },
+            index=df.index,
+        )
+        for column in ("Size Code", "English Description", "Barcode"):
+            values = np.full(len(df), None, dtype=object)
+            values[found] = self.entries[column].to_numpy(dtype=object)[positions[found]]
+            enriched[column] = values
+        return OrderLineCheck(positions=positions, enriched=enriched)
+
+
+class ReferenceStore:
+    """Parquet reference data under ``{cache_prefix}/reference/``.
+
+    Each items file stores its own item-master entries under ``items/``, keyed
+    by save time, so concurrent jobs never rewrite a shared object.
+    ``master.parquet`` merges the entries saved so far and records in its
+    schema metadata how far the merge got, so a build reads only the entries
+    saved since the last one. A workflow's item master is a snapshot of the
+    merged master written once under ``{workflow_id}/``, then read by every
+    file that needs it.
+    """
+
+    def __init__(self, s3_service: S3Service | None = None) -> None:
+        self.s3_service = s3_service or S3Service()
+
+    def save_item_entries(self, file_id: str, entries: pd.DataFrame) -> None:
+        self._save(self._entries_key(file_id), entries)
+
+    def build_item_master(self, workflow_id: str) -> ItemMasterIndex:
+        """Merge the entries saved since the last build; callers run one build at a time."""
+        entries, state = self._load_master()
+        # A slow writer can land an entry keyed before the last merged one,
+        # so the settle window before it is listed again; keys merged within
+        # it are remembered and skipped.
+        merged_recently = set(state.get("recent", []))
+        last_stamp = state.get("last_stamp")
+        start_after = self._entries_prefix()
+        if last_stamp is not None:
+            settled = _parse_stamp(last_stamp) - timedelta(seconds=CONFIG.item_master_settle_seconds)
+            start_after += _stamp(settled)
+        paginator = self.s3_service.client.get_paginator("list_objects_v2")
+        keys = sorted(
+            item["Key"]
+            for page in paginator.paginate(
+                Bucket=self.s3_service.bucket, Prefix=self._entries_prefix(), StartAfter=start_after
+            )
+            for item in page.get("Contents", [])
+            if item["Key"] not in merged_recently
+        )
+        if keys:
+            # Keys sort by save time, so a re-sent variant keeps its latest attributes.
+            pieces = [piece for piece in (self._load(key) for key in keys) if piece is not None and len(piece)]
+            if pieces:
+                entries = pd.concat([entries, *pieces], ignore_index=True) if len(entries) else pd.concat(pieces)
+            merged = sorted((self._key_stamp(key), key) for key in merged_recently.union(keys))
+            last_stamp = merged[-1][0]
+            cutoff = _stamp(_parse_stamp(last_stamp) - timedelta(seconds=CONFIG.item_master_settle_seconds))
+            state = {"last_stamp": last_stamp, "recent": [key for stamp, key in merged if stamp >= cutoff]}
+            entries = ItemMasterIndex(entries).entries
+            self._save(self._master_key(), entries, state)
+        item_master = ItemMasterIndex(entries)
+        self._save(self._item_master_key(workflow_id), item_master.entries)
+        return item_master
+
+    def load_item_master(self, workflow_id: str) -> ItemMasterIndex | None:
+        entries = self._load(self._item_master_key(workflow_id))
+        return ItemMasterIndex(entries) if entries is not None else None
+
+    def _load_master(self) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        body = self.s3_service.get_bytes_or_none(self._master_key())
+        if body is None:
+            return pd.DataFrame(columns=ITEM_MASTER_COLUMNS, dtype=object), {}
+        table = pq.read_table(io.BytesIO(body))
+        state = json.loads((table.schema.metadata or {}).get(_STATE_METADATA_KEY, b"{}"))
+        return table.to_pandas(), state
+
+    def _save(self, key: str, df: pd.DataFrame, state: Dict[str, Any] | None = None) -> None:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if state is not None:
+            table = table.replace_schema_metadata(
+                {**(table.schema.metadata or {}), _STATE_METADATA_KEY: json.dumps(state).encode()}
+            )
+        buffer = io.BytesIO()
+        pq.write_table(table, buffer)
+        self.s3_service.put_bytes(key, buffer.getvalue(), PARQUET_CONTENT_TYPE)
+
+    def _load(self, key: str) -> pd.DataFrame | None:
+        body = self.s3_service.get_bytes_or_none(key)
+        return pd.read_parquet(io.BytesIO(body)) if body is not None else None
+
+    def _entries_prefix(self) -> str:
+        return f"{CONFIG.cache_prefix}/reference/items/"
+
+    def _entries_key(self, file_id: str) -> str:
+        return f"{self._entries_prefix()}{_stamp(datetime.now(timezone.utc))}-{file_id}.parquet"
+
+    def _key_stamp(self, key: str) -> str:
+        return key[len(self._entries_prefix()) :].split("-", 1)[0]
+
+    def _master_key(self) -> str:
+        return f"{CONFIG.cache_prefix}/reference/master.parquet"
+
+    def _item_master_key(self, workflow_id: str) -> str:
+        return f"{CONFIG.cache_prefix}/reference/{workflow_id}/item_master.parquet"
+
+
+def _stamp(moment: datetime) -> str:
+    # Fixed width, so keys sort by time.
+    return moment.strftime(_STAMP_FORMAT)
+
+
+def _parse_stamp(stamp: str) -> datetime:
+    return datetime.strptime(stamp, _STAMP_FORMAT).replace(tzinfo=timezone.utc)
@@ -1,6 +1,15 @@
 """Validation rules for AI mapping and ERP requirements."""
 
-from typing import Dict, Iterable, List
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Mapping
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from app.engine.transformer import TransformationResult
 
 
 REQUIRED_FIELDS = {
@@ -9,13 +18,16 @@ REQUIRED_FIELDS = {
     "ORDER_CONFIRMATIONS": ["supplier_item_code", "color_code", "size_desc", "quantity"],
 }
 
+EAN_13 = "1"
+UPC_A = "2"
+
 
 def validate_mapping(file_type: str, mapping: Dict[str, str]) -> List[str]:
     errors: List[str] = []
     required = REQUIRED_FIELDS.get(file_type, [])
-    for field in required:
-        if field not in mapping or not mapping[field]:
-            errors.append(f"Missing required field mapping: {field}")
+    for field_name in required:
+        if field_name not in mapping or not mapping[field_name]:
+            errors.append(f"Missing required field mapping: {field_name}")
     return errors
 
 
@@ -23,5 +35,145 @@ def validate_required_columns(
     columns: Iterable[str],
     required_columns: Iterable[str],
 ) -> List[str]:
-    missing = [col for col in required_columns if col not in columns]
+    present = set(columns)
+    missing = [col for col in required_columns if col not in present]
     return [f"Missing required column: {col}" for col in missing]
+
+
+# Row-level rules on the ERP output frames. Each check is a column
+# expression over the whole frame returning a boolean mask of failing rows.
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    output: str
+    columns: tuple
+    check: Callable[[pd.DataFrame], np.ndarray]
+    message: str
+
+
+@dataclass
+class ValidationReport:
+    # Rule name -> positional row indexes (``iloc``) of the failing rows.
+    errors: Dict[str, np.ndarray] = field(default_factory=dict)
+    rows_checked: Dict[str, int] = field(default_factory=dict)
+    messages: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    @property
+    def error_count(self) -> int:
+        return sum(len(rows) for rows in self.errors.values())
+
+    def to_payload(self, sample_rows: int = 20) -> Dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "rows_checked": dict(self.rows_checked),
+            "errors": {
+                rule: {
+                    "message": self.messages[rule],
+                    "count": len(rows),
+                    "rows": rows[:sample_rows].tolist(),
+                }
+                for rule, rows in self.errors.items()
+            },
+        }
+
+
+def _text(series: pd.Series) -> pd.Series:
+    # Arrow-backed strings keep the .str operations in compiled code. Numeric
+    # cells arrive as ints or floats ("5012345678900.0").
+    text = series.astype(str).astype("string[pyarrow]")
+    return text.str.strip().str.replace(r"\.0+$", "", regex=True)
+
+
+def _gtin_valid(text: pd.Series, length: int) -> np.ndarray:
+    """Mask of values that are ``length`` digits with a correct GTIN check digit."""
+    shaped = text.str.fullmatch(rf"\d{{{length}}}").to_numpy(dtype=bool, na_value=False)
+    valid = np.zeros(len(text), dtype=bool)
+    if shaped.any():
+        # Matching values are fixed-width ASCII, so the Arrow data buffer of
+        # the filtered array is already a row-major digit matrix.
+        array = pa.array(text.array)
+        if isinstance(array, pa.ChunkedArray):
+            # Large or concatenated frames hold several chunks; the buffer
+            # walk below needs one contiguous array.
+            array = array.combine_chunks()
+        selected = array.filter(pa.array(shaped))
+        offsets = np.frombuffer(selected.buffers()[1], dtype=np.int64 if pa.types.is_large_string(selected.type) else np.int32)
+        offsets = offsets[selected.offset : selected.offset + len(selected) + 1]
+        raw = np.frombuffer(selected.buffers()[2], dtype=np.uint8)[offsets[0] : offsets[-1]]
+        digits = (raw - ord("0")).reshape(-1, length).astype(np.int32)
+        # Weights alternate 3, 1 leftwards from the digit next to the check digit.
+        weights = np.where((length - 1 - np.arange(length - 1)) % 2 == 1, 3, 1)
+        check = (10 - (digits[:, :-1] @ weights) % 10) % 10
+        valid[shaped] = check == digits[:, -1]
+    return valid
+
+
+def _bad_intrastat(df: pd.DataFrame) -> np.ndarray:
+    return ~_text(df["Intrastat Code"]).str.fullmatch(r"\d{8}").to_numpy(dtype=bool, na_value=False)
+
+
+def _bad_weight(df: pd.DataFrame) -> np.ndarray:
+    weight = df["Weight"].astype(str).astype("string[pyarrow]").str.replace(",", ".", regex=False)
+    return pd.to_numeric(weight, errors="coerce").isna().to_numpy(dtype=bool, na_value=True)
+
+
+def _bad_barcode(df: pd.DataFrame) -> np.ndarray:
+    text = _text(df["Barcode"])
+    barcode_type = df["Barcode Type"].astype(str).to_numpy()
+    valid = ((barcode_type == EAN_13) & _gtin_valid(text, 13)) | ((barcode_type == UPC_A) & _gtin_valid(text, 12))
+    return ~valid
+
+
+def _duplicate_variant(df: pd.DataFrame) -> np.ndarray:
+    # The first occurrence is kept; later ones would be rejected on import.
+    return df.duplicated(subset=["Supplier Item Code", "Color Code", "Size Code"], keep="first").to_numpy()
+
+
+RULES: List[Rule] = [
+    Rule("intrastat_8_digits", "file_a", ("Intrastat Code",), _bad_intrastat, "Intrastat code must be 8 digits"),
+    Rule("weight_numeric", "file_a", ("Weight",), _bad_weight, "Weight must be numeric"),
+    Rule(
+        "barcode_check_digit",
+        "file_c",
+        ("Barcode", "Barcode Type"),
+        _bad_barcode,
+        "Barcode must be a valid EAN-13 (type 1) or UPC-A (type 2)",
+    ),
+    Rule(
+        "duplicate_variant",
+        "file_b",
+        ("Supplier Item Code", "Color Code", "Size Code"),
+        _duplicate_variant,
+        "Duplicate (item, color, size) variant",
+    ),
+]
+
+
+def validate_outputs(outputs: Mapping[str, pd.DataFrame | None], rules: Iterable[Rule] = RULES) -> ValidationReport:
+    report = ValidationReport()
+    for rule in rules:
+        df = outputs.get(rule.output)
+        if df is None or not set(rule.columns).issubset(df.columns):
+            continue
+        report.rows_checked[rule.output] = len(df)
+        failing = np.flatnonzero(rule.check(df))
+        if len(failing):
+            report.errors[rule.name] = failing.astype(np.int32) if len(df) < 2**31 else failing
+            report.messages[rule.name] = rule.message
+    return report
+
+
+def validate_result(result: TransformationResult, rules: Iterable[Rule] = RULES) -> ValidationReport:
+    outputs = {
+        "file_a": result.file_a,
+        "file_b": result.file_b,
+        "file_c": result.file_c,
+        "cancellations": result.cancellations,
+    }
+    return validate_outputs(outputs, rules)
@@ -0,0 +1,305 @@
+"""End-to-end processing of one uploaded file, run inside a job worker."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+import pandas as pd
+
+from app.config.settings import CONFIG
+from app.engine.delta import ChangeDelta, RowIndexStore, process_change_file
+from app.engine.ingestion import detect_file_type, read_header, read_input
+from app.engine.reference import ItemMasterIndex, ReferenceStore, item_master_entries
+from app.engine.transformer import Transformer
+from app.engine.validators import validate_outputs
+from app.jobs.queue import COMPLETED, FAILED, Job, JobQueue
+from app.logging.file_logger import FileLog, FileLogger
+from app.logging.metrics import span
+from app.logging.s3_logger import S3Logger
+from app.logging.workflow_logger import WorkflowLog, WorkflowLogger, WorkflowStep
+from app.services.content_index import ContentIndex, content_key
+from app.services.parsed_input_cache import ParsedInputCache
+from app.services.s3_service import S3Service
+from app.services.signed_url_service import SignedUrlService
+from app.services.xlsx_output_service import OUTPUT_NAMES, XlsxOutputService
+
+
+# File types whose outputs depend only on the input bytes and the config, so
+# a re-upload can reuse them. A change file's outputs also depend on the
+# supplier's row index, and it must advance that index; order confirmations
+# are checked against the workflow's item master.
+_CONTENT_DEDUPE_TYPES = frozenset({"COLLECTION_ITEMS"})
+
+
+class Deferred(Exception):
+    """The job needs reference data that other jobs of its workflow have not produced yet."""
+
+    span_status = "deferred"
+
+
+class FilePipeline:
+    def __init__(
+        self,
+        s3_service: S3Service | None = None,
+        s3_logger: S3Logger | None = None,
+        transformer: Transformer | None = None,
+        parsed_cache: ParsedInputCache | None = None,
+        output_service: XlsxOutputService | None = None,
+        content_index: ContentIndex | None = None,
+        row_index_store: RowIndexStore | None = None,
+        reference_store: ReferenceStore | None = None,
+    ) -> None:
+        self.s3_service = s3_service or S3Service()
+        self.s3_logger = s3_logger or S3Logger(self.s3_service)
+        self.file_logger = FileLogger(self.s3_logger)
+        self.workflow_logger = WorkflowLogger(self.s3_logger)
+        self.transformer = transformer or Transformer()
+        self.parsed_cache = parsed_cache or ParsedInputCache(self.s3_service)
+        self.output_service = output_service or XlsxOutputService(self.s3_service)
+        self.content_index = content_index or ContentIndex(self.s3_service)
+        self.row_index_store = row_index_store or RowIndexStore(self.s3_service)
+        self.reference_store = reference_store or ReferenceStore(self.s3_service)
+        # Item masters already loaded by this worker, by workflow_id.
+        # Most recently used last; bounded by CONFIG.item_master_cache_workflows.
+        self._item_masters: "OrderedDict[str, ItemMasterIndex | None]" = OrderedDict()
+
+    def run(self, job: Job, queue: JobQueue) -> Dict[str, Any]:
+        """Process one file, checkpointing each step to ``queue``.
+
+        The per-file workflow log is kept in the job's progress; the combined
+        log of the workflow is written by ``write_workflow_summary``.
+        """
+        file_id = job.payload["file_id"]
+        filename = job.payload["filename"]
+        workflow_log = WorkflowLog(workflow_id=job.workflow_id, file_ids=[file_id])
+        file_log = FileLog(file_id=file_id, original_filename=filename, processing_status="processing")
+        try:
+            result = self._run(job, queue, workflow_log, file_log)
+            file_log.processing_status = "cached" if result.get("cached") else "completed"
+            return result
+        except Deferred:
+            queue.checkpoint(job.job_id, None, workflow_log.to_payload())
+            raise
+        except Exception as error:
+            file_log.processing_status = "failed"
+            file_log.errors.append(f"{type(error).__name__}: {error}")
+            raise
+        finally:
+            if file_log.processing_status != "processing":
+                queue.checkpoint(job.job_id, None, workflow_log.to_payload())
+                self.file_logger.write(file_log)
+                self.s3_logger.flush()
+
+    def write_workflow_summary(self, workflow_id: str, jobs: List[Job]) -> WorkflowLog:
+        """One workflow log for all files of a workflow, with a step per file."""
+        workflow_log = WorkflowLog(workflow_id=workflow_id, file_ids=[job.payload["file_id"] for job in jobs])
+        for job in jobs:
+            steps = job.progress.get("steps", [])
+            workflow_log.steps.append(
+                WorkflowStep(
+                    name=f"file:{job.payload['filename']}",
+                    status=job.status,
+                    started_at=job.created_at,
+                    finished_at=job.updated_at,
+                    failure_reason=job.error,
+                    metrics={
+                        "file_id": job.payload["file_id"],
+                        "file_type": job.file_type,
+                        "attempts": job.attempts,
+                        "seconds": sum(step["duration_seconds"] or 0.0 for step in steps),
+                        "steps": {step["name"]: step["duration_seconds"] for step in steps},
+                    },
+                )
+            )
+        self.workflow_logger.write(workflow_log)
+        self.s3_logger.flush()
+        return workflow_log
+
+    def _run(self, job: Job, queue: JobQueue, workflow_log: WorkflowLog, file_log: FileLog) -> Dict[str, Any]:
+        file_id = file_log.file_id
+        filename = file_log.original_filename
+
+        def step(name: str):
+            return self._step(name, job, queue, workflow_log)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, os.path.basename(filename))
+            with step("download") as metrics:
+                key = SignedUrlService(self.s3_service).input_key(file_id, filename)
+                # Hashed as the parts arrive, so the file is not read back.
+                hasher = hashlib.sha256()
+                metrics["bytes"] = self.s3_service.download(key, path, on_chunk=hasher.update)
+                file_log.content_hash = hasher.hexdigest()
+
+            with step("detect") as metrics:
+                file_type = detect_file_type(read_header(path))
+                file_log.detected_file_type = file_type
+                queue.set_file_type(job.job_id, file_type)
+                metrics["file_type"] = file_type
+
+            if file_type in _CONTENT_DEDUPE_TYPES:
+                with step("dedupe") as metrics:
+                    cached = self.content_index.lookup(content_key(file_log.content_hash))
+                    metrics["cached"] = cached is not None
+                if cached is not None:
+                    # Same bytes, same output-relevant config and transformer
+                    # version: drop the duplicate upload and reuse the outputs.
+                    self.s3_service.client.delete_object(Bucket=self.s3_service.bucket, Key=key)
+                    file_log.output_paths = cached["output_paths"]
+                    file_log.warnings.append(f"Duplicate of file_id={cached['file_id']}; reusing its outputs")
+                    return {
+                        "file_id": file_id,
+                        "file_type": file_type,
+                        "cached": True,
+                        "output_paths": file_log.output_paths,
+                        "warnings": file_log.warnings,
+                    }
+
+            with step("parse") as metrics:
+                df, from_cache = self.parsed_cache.get_or_parse(
+                    file_id, file_type, lambda: read_input(path, file_type)[0]
+                )
+                metrics.update(rows=len(df), from_cache=from_cache)
+
+        if file_type != "COLLECTION_CHANGES":
+            return self._process(job, queue, workflow_log, file_log, file_type, df)
+        # Change files of a supplier diff against its one row index, so they
+        # run one at a time; the index is saved only after a successful run.
+        lock = f"row_index:{CONFIG.basic_supplier_code}"
+        if not queue.try_lock(lock, job.job_id):
+            raise Deferred("another change file of the supplier is being processed")
+        try:
+            return self._process(job, queue, workflow_log, file_log, file_type, df)
+        finally:
+            queue.release_lock(lock, job.job_id)
+
+    def _process(
+        self,
+        job: Job,
+        queue: JobQueue,
+        workflow_log: WorkflowLog,
+        file_log: FileLog,
+        file_type: str,
+        df: pd.DataFrame,
+    ) -> Dict[str, Any]:
+        file_id = file_log.file_id
+
+        def step(name: str):
+            return self._step(name, job, queue, workflow_log)
+
+        item_master = None
+        if file_type == "ORDER_CONFIRMATIONS":
+            with step("reference") as metrics:
+                item_master = self._item_master(job, queue)
+                metrics["item_master_entries"] = len(item_master) if item_master is not None else 0
+
+        with step("transform") as metrics:
+            outputs, delta = self._transform(file_type, df, workflow_log)
+            metrics["rows"] = len(df)
+            metrics["output_rows"] = {name: len(frame) for name, frame in outputs.items()}
+
+        if file_type == "COLLECTION_ITEMS":
+            with step("reference") as metrics:
+                entries = item_master_entries(df, outputs)
+                self.reference_store.save_item_entries(file_id, entries)
+                metrics["item_master_entries"] = len(entries)
+
+        with step("validate") as metrics:
+            report = validate_outputs(outputs).to_payload()
+            metrics.update(report)
+            for rule, details in report["errors"].items():
+                file_log.warnings.append(f"{details['message']}: {details['count']} rows ({rule})")
+            if item_master is not None:
+                check = item_master.check_order_lines(df)
+                metrics["unknown_order_lines"] = check.unknown_count
+                if check.unknown_count:
+                    file_log.warnings.append(
+                        f"{check.unknown_count} order lines are not in the item master, "
+                        f"e.g. {'; '.join(check.unknown_keys(5))}"
+                    )
+
+        with step("write") as metrics:
+            keys = self.output_service.write_outputs(file_id, {name: [frame] for name, frame in outputs.items()})
+            file_log.output_paths = list(keys.values())
+            metrics["outputs"] = len(keys)
+
+        if file_type in _CONTENT_DEDUPE_TYPES:
+            with step("index"):
+                self.content_index.record(content_key(file_log.content_hash), file_id, file_log.output_paths)
+
+        if delta is not None:
+            with step("row_index") as metrics:
+                self.row_index_store.save(CONFIG.basic_supplier_code, delta.index)
+                metrics["rows"] = len(delta.index)
+
+        return {
+            "file_id": file_id,
+            "file_type": file_type,
+            "output_paths": file_log.output_paths,
+            "warnings": file_log.warnings,
+        }
+
+    def _item_master(self, job: Job, queue: JobQueue) -> ItemMasterIndex | None:
+        """The item master of every items file processed so far, built once per workflow.
+
+        Defers while an items file (or a file of unknown type) of the same
+        workflow is still pending, or while another job is building an item
+        master. ``None`` when no items file has been processed yet.
+        """
+        if job.workflow_id in self._item_masters:
+            self._item_masters.move_to_end(job.workflow_id)
+            return self._item_masters[job.workflow_id]
+        siblings = [other for other in queue.jobs_for_workflow(job.workflow_id) if other.job_id != job.job_id]
+        if any(
+            other.status not in (COMPLETED, FAILED) and other.file_type in (None, "COLLECTION_ITEMS")
+            for other in siblings
+        ):
+            raise Deferred("waiting for items files")
+        item_master = self.reference_store.load_item_master(job.workflow_id)
+        if item_master is None:
+            # Every workflow's build updates the one merged master.
+            if not queue.try_lock("item_master", job.job_id):
+                raise Deferred("item master is being built")
+            try:
+                item_master = self.reference_store.load_item_master(job.workflow_id)
+                if item_master is None:
+                    item_master = self.reference_store.build_item_master(job.workflow_id)
+            finally:
+                queue.release_lock("item_master", job.job_id)
+        if not len(item_master):
+            item_master = None
+        self._item_masters[job.workflow_id] = item_master
+        if len(self._item_masters) > CONFIG.item_master_cache_workflows:
+            self._item_masters.popitem(last=False)
+        return item_master
+
+    def _transform(
+        self, file_type: str, df: pd.DataFrame, workflow_log: WorkflowLog
+    ) -> Tuple[Dict[str, pd.DataFrame], ChangeDelta | None]:
+        delta = None
+        if file_type == "COLLECTION_CHANGES":
+            result, delta = process_change_file(
+                df,
+                transformer=self.transformer,
+                store=self.row_index_store,
+                supplier=CONFIG.basic_supplier_code,
+                workflow_log=workflow_log,
+            )
+        elif file_type == "ORDER_CONFIRMATIONS":
+            return {"order_confirmations": self.transformer.transform_order_confirmations(df)}, None
+        else:
+            result = self.transformer.transform_items(df)
+        outputs = {name: getattr(result, name) for name in OUTPUT_NAMES if getattr(result, name) is not None}
+        return outputs, delta
+
+    @contextmanager
+    def _step(self, name: str, job: Job, queue: JobQueue, workflow_log: WorkflowLog) -> Iterator[Dict[str, Any]]:
+        queue.checkpoint(job.job_id, name, workflow_log.to_payload())
+        with span(name, workflow_log) as current:
+            yield current.metrics
+
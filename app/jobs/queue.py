@@ -0,0 +1,259 @@
+"""SQLite-backed persistent job queue shared by the Dash process and workers."""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Tuple
+
+from app.config.settings import CONFIG
+
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    workflow_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    file_type TEXT,
+    not_before TEXT,
+    current_step TEXT,
+    progress TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    heartbeat_at TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_workflow ON jobs (workflow_id);
+CREATE TABLE IF NOT EXISTS locks (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    acquired_at TEXT NOT NULL
+);
+"""
+# Columns added after the first release, for queues created before them.
+_ADDED_COLUMNS = {"file_type": "TEXT", "not_before": "TEXT", "owner": "TEXT", "heartbeat_at": "TEXT"}
+
+
+@dataclass
+class Job:
+    job_id: str
+    workflow_id: str
+    kind: str
+    payload: Dict[str, Any]
+    status: str
+    file_type: str | None = None
+    current_step: str | None = None
+    progress: Dict[str, Any] = field(default_factory=dict)
+    result: Dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+    attempts: int = 0
+    created_at: str = ""
+    updated_at: str = ""
+
+    def to_payload(self) -> Dict[str, Any]:
+        return self.__dict__.copy()
+
+
+def _now(delay_seconds: float = 0.0) -> str:
+    return (datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)).isoformat()
+
+
+class JobQueue:
+    """Jobs survive restarts; each connection is opened per call, so the
+    queue can be used from any thread or process."""
+
+    def __init__(self, path: str = CONFIG.job_db_path) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            existing = {row["name"] for row in connection.execute("PRAGMA table_info(jobs)")}
+            for name, column_type in _ADDED_COLUMNS.items():
+                if name not in existing:
+                    connection.execute(f"ALTER TABLE jobs ADD COLUMN {name} {column_type}")
+
+    def enqueue(self, workflow_id: str, kind: str, payload: Dict[str, Any]) -> str:
+        job_id = str(uuid.uuid4())
+        now = _now()
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT INTO jobs (job_id, workflow_id, kind, payload, status, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, workflow_id, kind, json.dumps(payload), QUEUED, now, now),
+            )
+        return job_id
+
+    def claim(self, owner: str | None = None) -> Job | None:
+        """Atomically move the oldest ready queued job to running, held by ``owner``."""
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT job_id FROM jobs WHERE status = ? AND (not_before IS NULL OR not_before <= ?)"
+                " ORDER BY created_at LIMIT 1",
+                (QUEUED, _now()),
+            ).fetchone()
+            if row is None:
+                return None
+            now = _now()
+            connection.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, owner = ?, heartbeat_at = ?, updated_at = ?"
+                " WHERE job_id = ?",
+                (RUNNING, owner, now, now, row["job_id"]),
+            )
+        return self.get(row["job_id"])
+
+    def checkpoint(self, job_id: str, current_step: str | None, progress: Dict[str, Any]) -> None:
+        self._update(job_id, current_step=current_step, progress=json.dumps(progress))
+
+    def set_file_type(self, job_id: str, file_type: str) -> None:
+        self._update(job_id, file_type=file_type)
+
+    def defer(self, job_id: str, delay_seconds: float) -> None:
+        """Return a running job to the queue, to be claimed again after ``delay_seconds``.
+
+        Waiting for other jobs is not a failed attempt, so the claim is not counted.
+        """
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, current_step = NULL, not_before = ?, attempts = MAX(attempts - 1, 0),"
+                " updated_at = ? WHERE job_id = ?",
+                (QUEUED, _now(delay_seconds), _now(), job_id),
+            )
+
+    def retry(self, job_id: str, error: str, max_attempts: int = CONFIG.job_max_attempts) -> None:
+        """Requeue a running job whose run was lost, or fail it once it has used ``max_attempts``."""
+        self._retry("job_id = ?", (job_id,), error, max_attempts)
+
+    def complete(self, job_id: str, result: Dict[str, Any]) -> None:
+        self._update(job_id, status=COMPLETED, current_step=None, result=json.dumps(result), error=None)
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._update(job_id, status=FAILED, current_step=None, error=error)
+
+    def heartbeat(self, owner: str) -> None:
+        """Mark the running jobs of ``owner`` as still held."""
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE status = ? AND owner = ?",
+                (_now(), RUNNING, owner),
+            )
+
+    def requeue_stale(
+        self,
+        stale_seconds: float = CONFIG.job_stale_seconds,
+        max_attempts: int = CONFIG.job_max_attempts,
+    ) -> int:
+        """Retry running jobs whose owner has not sent a heartbeat for ``stale_seconds``.
+
+        Jobs held by a live process, including another web process sharing
+        the queue, keep running.
+        """
+        return self._retry(
+            "COALESCE(heartbeat_at, updated_at) < ?",
+            (_now(-stale_seconds),),
+            "Requeued: the process running the job stopped",
+            max_attempts,
+        )
+
+    def try_lock(self, name: str, owner: str, ttl_seconds: float = CONFIG.job_lock_ttl_seconds) -> bool:
+        """Take a named lock for job ``owner``; False while another job holds it.
+
+        A lock expires once its holder is no longer running (it finished,
+        failed or was requeued) or after ``ttl_seconds``; a retried job may
+        take back its own lock.
+        """
+        with self._connect() as connection:
+            connection.execute(
+                "DELETE FROM locks WHERE name = ? AND (owner = ? OR acquired_at < ? "
+                "OR owner NOT IN (SELECT job_id FROM jobs WHERE status = ?))",
+                (name, owner, _now(-ttl_seconds), RUNNING),
+            )
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO locks (name, owner, acquired_at) VALUES (?, ?, ?)",
+                (name, owner, _now()),
+            )
+            return cursor.rowcount == 1
+
+    def release_lock(self, name: str, owner: str) -> None:
+        # Only the holder's own lock: after expiry the name may belong to another job.
+        with self._connect() as connection:
+            connection.execute("DELETE FROM locks WHERE name = ? AND owner = ?", (name, owner))
+
+    def get(self, job_id: str) -> Job | None:
+        with self._connect() as connection:
+            row = connection.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._job(row) if row is not None else None
+
+    def jobs_for_workflow(self, workflow_id: str) -> List[Job]:
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT * FROM jobs WHERE workflow_id = ? ORDER BY created_at",
+                (workflow_id,),
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def _retry(self, where: str, params: Tuple[Any, ...], error: str, max_attempts: int) -> int:
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts < ? THEN ? ELSE ? END, current_step = NULL,"
+                f" error = ?, updated_at = ? WHERE status = ? AND {where}",
+                (max_attempts, QUEUED, FAILED, error, _now(), RUNNING, *params),
+            )
+            return cursor.rowcount
+
+    def _update(self, job_id: str, **columns: Any) -> None:
+        columns["updated_at"] = _now()
+        assignments = ", ".join(f"{name} = ?" for name in columns)
+        with self._connect() as connection:
+            connection.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*columns.values(), job_id))
+
+    def _job(self, row: sqlite3.Row) -> Job:
+        return Job(
+            job_id=row["job_id"],
+            workflow_id=row["workflow_id"],
+            kind=row["kind"],
+            payload=json.loads(row["payload"]),
+            status=row["status"],
+            file_type=row["file_type"],
+            current_step=row["current_step"],
+            progress=json.loads(row["progress"]) if row["progress"] else {},
+            result=json.loads(row["result"]) if row["result"] else {},
+            error=row["error"],
+            attempts=row["attempts"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+        )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # isolation_level=None leaves transactions to explicit BEGIN; the
+        # busy timeout covers concurrent writers in other processes.
+        connection = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        try:
+            yield connection
+            if connection.in_transaction:
+                connection.execute("COMMIT")
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
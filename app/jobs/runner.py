@@ -0,0 +1,152 @@
+"""Dispatch queued jobs to a pool of worker processes."""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Tuple
+
+from app.config.settings import CONFIG
+from app.jobs.queue import COMPLETED, FAILED, JobQueue
+from app.logging.metrics import METRICS
+
+
+logger = logging.getLogger(__name__)
+
+_PIPELINE = None
+
+
+def run_job(db_path: str, job_id: str) -> None:
+    """Worker-process entry point; all state goes through the queue."""
+    global _PIPELINE
+    from app.jobs.pipeline import Deferred, FilePipeline
+
+    if _PIPELINE is None:
+        # Clients, caches and the log sink are reused across jobs in a worker.
+        _PIPELINE = FilePipeline()
+    queue = JobQueue(db_path)
+    job = queue.get(job_id)
+    try:
+        try:
+            result = _PIPELINE.run(job, queue)
+        except Deferred:
+            queue.defer(job_id, CONFIG.job_defer_seconds)
+            return
+        except Exception as error:
+            logger.exception("Job %s failed", job_id)
+            queue.fail(job_id, f"{type(error).__name__}: {error}")
+        else:
+            queue.complete(job_id, result)
+        jobs = queue.jobs_for_workflow(job.workflow_id)
+        if all(other.status in (COMPLETED, FAILED) for other in jobs):
+            _PIPELINE.write_workflow_summary(job.workflow_id, jobs)
+    finally:
+        # Make this worker's stage and AWS timings visible to /metrics.
+        METRICS.write_snapshot()
+
+
+class JobRunner:
+    """Claims queued jobs from a background thread of the web process.
+
+    Workers are spawned rather than forked because the web process runs
+    request threads and a log writer thread. The dispatcher sends a
+    heartbeat for the jobs it holds; running jobs whose runner stopped
+    sending one, in this or another process, are retried.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue | None = None,
+        max_workers: int = CONFIG.job_workers,
+        poll_interval: float = 0.5,
+    ) -> None:
+        self.queue = queue or JobQueue()
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self._pool: ProcessPoolExecutor | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def start(self, recover: bool = True) -> None:
+        """Start dispatching; ``recover`` retries jobs whose runner stopped."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if recover:
+                self.queue.requeue_stale()
+            if self._pool is None:
+                self._pool = self._new_pool()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._dispatch, name="job-runner", daemon=True)
+            self._thread.start()
+
+    def notify(self) -> None:
+        """Wake the dispatcher after enqueueing instead of waiting for the next poll."""
+        self._wake.set()
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                return
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._pool.shutdown(wait=True)
+            self._thread = None
+            self._pool = None
+            self._stop.clear()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _replace_pool(self, broken: ProcessPoolExecutor) -> None:
+        # Every future of a broken pool fails; replace the pool only once.
+        if self._pool is broken:
+            logger.warning("A job worker died; starting a new worker pool")
+            broken.shutdown(wait=False)
+            self._pool = self._new_pool()
+
+    def _dispatch(self) -> None:
+        in_flight: Dict[Future, Tuple[str, ProcessPoolExecutor]] = {}
+        last_heartbeat = 0.0
+        while not self._stop.is_set():
+            if time.monotonic() - last_heartbeat >= CONFIG.job_heartbeat_seconds:
+                self.queue.heartbeat(self.owner)
+                self.queue.requeue_stale()
+                last_heartbeat = time.monotonic()
+            while len(in_flight) < self.max_workers:
+                job = self.queue.claim(self.owner)
+                if job is None:
+                    break
+                pool = self._pool
+                try:
+                    in_flight[pool.submit(run_job, self.queue.path, job.job_id)] = (job.job_id, pool)
+                except BrokenProcessPool as error:
+                    self.queue.retry(job.job_id, f"{type(error).__name__}: {error}")
+                    self._replace_pool(pool)
+            if in_flight:
+                done, _ = wait(list(in_flight), timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id, pool = in_flight.pop(future)
+                    error = future.exception()
+                    if isinstance(error, BrokenProcessPool):
+                        # A worker died, and the pool fails every job it was running.
+                        self.queue.retry(job_id, f"{type(error).__name__}: {error}")
+                        self._replace_pool(pool)
+                    elif error is not None:
+                        # The worker failed before it could record the outcome.
+                        self.queue.fail(job_id, f"{type(error).__name__}: {error}")
+            else:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+        wait(list(in_flight))
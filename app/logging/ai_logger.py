@@ -18,6 +18,7 @@ class AILog:
     output: Dict[str, Any]
     confidence: float
     validation_result: str
+    cache_status: str | None = None
 
     def to_payload(self) -> Dict[str, Any]:
         prompt_hash = stable_hash(self.prompt)
@@ -30,6 +31,7 @@ class AILog:
             "output_json": self.output,
             "confidence": self.confidence,
             "validation_result": self.validation_result,
+            "cache_status": self.cache_status,
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
 
@@ -0,0 +1,440 @@
+"""Compacted, date-partitioned Parquet copy of the audit logs, and queries over it.
+
+The loggers write one small JSON object per key (``logs/files/{id}.json``,
+``logs/workflows/{id}.json``, ``logs/ai/{file_id}/{agent}.json``), or batch
+the same records into NDJSON segments under ``logs/segments/`` when
+write-behind is on. ``AuditLogCompactor`` folds both into Parquet parts under
+``logs/compacted/{kind}/date=YYYY-MM-DD/``, one part per partition, and
+lists every part in ``logs/compacted/manifest.json``. ``AuditStore`` answers queries from the
+manifest, reading only the parts whose dates overlap the requested range and
+only the requested columns.
+
+Run a compaction with ``python -m app.logging.audit_store``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import tempfile
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from app.config.settings import CONFIG
+from app.services.s3_service import PARQUET_CONTENT_TYPE, S3Service
+
+
+FILES = "files"
+WORKFLOWS = "workflows"
+AI = "ai"
+
+_STRINGS = pa.list_(pa.string())
+_TIMESTAMP = pa.timestamp("us", tz="UTC")
+
+SCHEMAS: Dict[str, pa.Schema] = {
+    FILES: pa.schema(
+        [
+            ("key", pa.string()),
+            ("logged_at", _TIMESTAMP),
+            ("file_id", pa.string()),
+            ("original_filename", pa.string()),
+            ("detected_file_type", pa.string()),
+            ("upload_timestamp", pa.string()),
+            ("processing_status", pa.string()),
+            ("errors", _STRINGS),
+            ("warnings", _STRINGS),
+            ("output_paths", _STRINGS),
+            ("content_hash", pa.string()),
+        ]
+    ),
+    WORKFLOWS: pa.schema(
+        [
+            ("key", pa.string()),
+            ("logged_at", _TIMESTAMP),
+            ("workflow_id", pa.string()),
+            ("file_ids", _STRINGS),
+            ("step_count", pa.int32()),
+            ("failed_steps", pa.int32()),
+            ("duration_seconds", pa.float64()),
+            ("steps_json", pa.string()),
+        ]
+    ),
+    # The prompt and input snapshot stay in the raw objects; prompt_hash
+    # identifies them.
+    AI: pa.schema(
+        [
+            ("key", pa.string()),
+            ("logged_at", _TIMESTAMP),
+            ("file_id", pa.string()),
+            ("agent_name", pa.string()),
+            ("model_name", pa.string()),
+            ("prompt_hash", pa.string()),
+            ("confidence", pa.float64()),
+            ("validation_result", pa.string()),
+            ("cache_status", pa.string()),
+            ("timestamp", pa.string()),
+            ("output_json", pa.string()),
+        ]
+    ),
+}
+
+
+def record_kind(key: str) -> str | None:
+    """The log kind of a full object key (``logs/files/…`` -> "files")."""
+    parts = key[len(CONFIG.logs_prefix) + 1 :].split("/")
+    if parts[0] in SCHEMAS and len(parts) >= 2:
+        return parts[0]
+    return None
+
+
+def flatten(kind: str, key: str, logged_at: datetime, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """One row of the ``kind`` schema from a logged payload."""
+    row: Dict[str, Any] = {"key": key, "logged_at": logged_at}
+    if kind == FILES:
+        for name in SCHEMAS[FILES].names[2:]:
+            row[name] = payload.get(name)
+    elif kind == WORKFLOWS:
+        steps = payload.get("steps") or []
+        row.update(
+            workflow_id=payload.get("workflow_id"),
+            file_ids=payload.get("file_ids"),
+            step_count=len(steps),
+            failed_steps=sum(step.get("status") == "failed" for step in steps),
+            duration_seconds=sum(step.get("duration_seconds") or 0.0 for step in steps),
+            steps_json=json.dumps(steps, ensure_ascii=False),
+        )
+    else:
+        file_id = key[len(CONFIG.logs_prefix) + 1 :].split("/")[1]
+        confidence = payload.get("confidence")
+        row.update(
+            file_id=file_id,
+            agent_name=payload.get("agent_name"),
+            model_name=payload.get("model_name"),
+            prompt_hash=payload.get("prompt_hash"),
+            confidence=float(confidence) if confidence is not None else None,
+            validation_result=payload.get("validation_result"),
+            cache_status=payload.get("cache_status"),
+            timestamp=payload.get("timestamp"),
+            output_json=json.dumps(payload.get("output_json"), ensure_ascii=False),
+        )
+    return row
+
+
+@dataclass
+class CompactionResult:
+    records: int
+    parts: List[Dict[str, Any]]
+    watermark: str
+
+
+class _PartWriter:
+    """One compacted part, spooled to a local file a row group per batch."""
+
+    def __init__(self, kind: str, path: str) -> None:
+        self.path = path
+        self.writer = pq.ParquetWriter(path, SCHEMAS[kind])
+        self.rows = 0
+        self.min_logged_at: datetime | None = None
+        self.max_logged_at: datetime | None = None
+
+    def write(self, table: pa.Table) -> None:
+        self.writer.write_table(table)
+        logged_at = table.column("logged_at")
+        low, high = pc.min(logged_at).as_py(), pc.max(logged_at).as_py()
+        self.min_logged_at = low if self.min_logged_at is None else min(self.min_logged_at, low)
+        self.max_logged_at = high if self.max_logged_at is None else max(self.max_logged_at, high)
+        self.rows += table.num_rows
+
+
+class AuditLogCompactor:
+    """Folds new per-key log objects and NDJSON segments into Parquet parts.
+
+    Only sources last modified between the previous watermark and
+    ``now - lag_seconds`` are read, so writes still in flight are picked up
+    by the next run. Segment keys sort by time, so only the segments after
+    the watermark are listed. Per-key objects are named by id and cannot be
+    listed from a watermark; they are scanned on the first run and, with
+    ``scan_objects``, on every run (the default when loggers write them
+    directly instead of through write-behind).
+
+    Bodies are read ahead by at most ``read_workers`` and records go to the
+    part writers in batches of ``batch_records``, so memory does not grow
+    with the window. A key logged several times in one batch keeps its
+    latest record; ``AuditStore.query(latest=True)`` resolves keys across
+    batches and runs.
+
+    Every (kind, day) partition a run touches is rewritten into a single
+    part: its existing parts are streamed into the new one, replaced in the
+    manifest and deleted once the manifest is written. A run therefore
+    re-reads only the days it adds records to, and the part count stays at
+    one per partition. Runs must not overlap: the manifest is read and
+    rewritten.
+    """
+
+    def __init__(
+        self,
+        s3_service: S3Service | None = None,
+        lag_seconds: float = CONFIG.audit_compaction_lag_seconds,
+        read_workers: int = CONFIG.audit_read_workers,
+        batch_records: int = CONFIG.audit_batch_records,
+        scan_objects: bool = not CONFIG.log_write_behind,
+    ) -> None:
+        self.s3_service = s3_service or S3Service()
+        self.lag_seconds = lag_seconds
+        self.read_workers = read_workers
+        self.batch_records = batch_records
+        self.scan_objects = scan_objects
+
+    def compact(self, now: datetime | None = None) -> CompactionResult:
+        manifest = load_manifest(self.s3_service)
+        since = datetime.fromisoformat(manifest["watermark"]) if manifest["watermark"] else None
+        until = (now or datetime.now(timezone.utc)) - timedelta(seconds=self.lag_seconds)
+        writers: Dict[Tuple[str, date], _PartWriter] = {}
+        records = 0
+        with tempfile.TemporaryDirectory() as directory:
+            try:
+                batch: Dict[str, Tuple[datetime, str, Dict[str, Any]]] = {}
+                for kind, key, logged_at, payload in self._records(since, until):
+                    if key not in batch or logged_at >= batch[key][0]:
+                        batch[key] = (logged_at, kind, payload)
+                    if len(batch) >= self.batch_records:
+                        records += self._write_batch(batch, writers, directory)
+                        batch = {}
+                records += self._write_batch(batch, writers, directory)
+                replaced = [part for part in manifest["parts"] if _partition(part) in writers]
+                for part in replaced:
+                    self._merge_part(part, writers[_partition(part)], directory)
+            finally:
+                for writer in writers.values():
+                    writer.writer.close()
+            parts = [self._upload_part(kind, day, writers[kind, day]) for kind, day in sorted(writers)]
+        manifest["parts"] = [part for part in manifest["parts"] if _partition(part) not in writers] + parts
+        manifest["watermark"] = until.isoformat()
+        self.s3_service.put_json(manifest_key(), manifest)
+        for part in replaced:
+            self.s3_service.client.delete_object(Bucket=self.s3_service.bucket, Key=part["key"])
+        return CompactionResult(records=records, parts=parts, watermark=manifest["watermark"])
+
+    def _records(self, since: datetime | None, until: datetime) -> Iterator[Tuple[str, str, datetime, Dict[str, Any]]]:
+        if since is None or self.scan_objects:
+            objects = (
+                item
+                for kind in SCHEMAS
+                for item in self._list(f"{CONFIG.logs_prefix}/{kind}/")
+                if _in_window(item["LastModified"], since, until)
+            )
+            for item, body in self._read_ahead(objects):
+                kind = record_kind(item["Key"])
+                if kind is not None:
+                    yield kind, item["Key"], item["LastModified"], json.loads(body)
+        segments = (item for item in self._segments(since, until) if _in_window(item["LastModified"], since, until))
+        for _, body in self._read_ahead(segments):
+            for line in body.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                kind = record_kind(record["key"])
+                if kind is not None:
+                    yield kind, record["key"], datetime.fromisoformat(record["queued_at"]), record["payload"]
+
+    def _read_ahead(self, items: Iterable[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], bytes]]:
+        """``(item, body)`` in listing order, with at most ``read_workers`` bodies held."""
+        with ThreadPoolExecutor(max_workers=self.read_workers) as pool:
+            pending: deque = deque()
+            try:
+                for item in items:
+                    pending.append((item, pool.submit(self._read, item["Key"])))
+                    if len(pending) >= self.read_workers:
+                        item, future = pending.popleft()
+                        yield item, future.result()
+                while pending:
+                    item, future = pending.popleft()
+                    yield item, future.result()
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def _segments(self, since: datetime | None, until: datetime) -> Iterator[Dict[str, Any]]:
+        """Segment objects from the window's day prefixes, starting after the watermark.
+
+        A segment's key is stamped just before its PUT, so it can sort
+        before its LastModified; listing starts ``lag_seconds`` early.
+        """
+        prefix = f"{CONFIG.logs_prefix}/segments/"
+        if since is None:
+            yield from self._list(prefix)
+            return
+        start = since - timedelta(seconds=self.lag_seconds)
+        day = start.date()
+        while day <= until.date():
+            day_prefix = f"{prefix}{day:%Y/%m/%d}/"
+            start_after = f"{day_prefix}{start:%H%M%S%f}" if day == start.date() else None
+            yield from self._list(day_prefix, start_after)
+            day += timedelta(days=1)
+
+    def _list(self, prefix: str, start_after: str | None = None) -> Iterator[Dict[str, Any]]:
+        paginator = self.s3_service.client.get_paginator("list_objects_v2")
+        extra = {"StartAfter": start_after} if start_after else {}
+        for page in paginator.paginate(Bucket=self.s3_service.bucket, Prefix=prefix, **extra):
+            yield from page.get("Contents", [])
+
+    def _read(self, key: str) -> bytes:
+        return self.s3_service.get_bytes(key)
+
+    def _write_batch(
+        self,
+        batch: Dict[str, Tuple[datetime, str, Dict[str, Any]]],
+        writers: Dict[Tuple[str, date], _PartWriter],
+        directory: str,
+    ) -> int:
+        rows: Dict[Tuple[str, date], List[Dict[str, Any]]] = {}
+        for key, (logged_at, kind, payload) in batch.items():
+            rows.setdefault((kind, logged_at.date()), []).append(flatten(kind, key, logged_at, payload))
+        for (kind, day), part_rows in rows.items():
+            if (kind, day) not in writers:
+                writers[kind, day] = _PartWriter(kind, os.path.join(directory, f"{kind}-{day.isoformat()}.parquet"))
+            writers[kind, day].write(pa.Table.from_pylist(part_rows, schema=SCHEMAS[kind]).sort_by("logged_at"))
+        return len(batch)
+
+    def _merge_part(self, part: Dict[str, Any], writer: _PartWriter, directory: str) -> None:
+        path = os.path.join(directory, "merge.parquet")
+        self.s3_service.download(part["key"], path)
+        with pq.ParquetFile(path) as existing:
+            for batch in existing.iter_batches(batch_size=self.batch_records):
+                writer.write(pa.Table.from_batches([batch], schema=SCHEMAS[part["kind"]]))
+        os.remove(path)
+
+    def _upload_part(self, kind: str, day: date, writer: _PartWriter) -> Dict[str, Any]:
+        key = f"{CONFIG.logs_prefix}/compacted/{kind}/date={day.isoformat()}/part-{uuid.uuid4().hex}.parquet"
+        self.s3_service.put_file(key, writer.path, PARQUET_CONTENT_TYPE)
+        return {
+            "kind": kind,
+            "date": day.isoformat(),
+            "key": key,
+            "rows": writer.rows,
+            "min_logged_at": writer.min_logged_at.isoformat(),
+            "max_logged_at": writer.max_logged_at.isoformat(),
+        }
+
+
+class AuditStore:
+    """Queries over the compacted audit logs."""
+
+    def __init__(self, s3_service: S3Service | None = None, read_workers: int = CONFIG.audit_read_workers) -> None:
+        self.s3_service = s3_service or S3Service()
+        self.read_workers = read_workers
+
+    def query(
+        self,
+        kind: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        columns: Sequence[str] | None = None,
+        filters: List[Tuple[str, str, Any]] | None = None,
+        latest: bool = True,
+    ) -> pd.DataFrame:
+        """Records of ``kind`` logged in [start, end).
+
+        Only parts whose partition date overlaps the range are read, and
+        from them only ``columns`` (plus key and logged_at). ``filters`` are
+        pyarrow row filters such as ``[("processing_status", "==", "failed")]``.
+        With ``latest``, a key logged more than once keeps its latest record;
+        the filters apply before that, so a key can match on an earlier record.
+        """
+        start = _utc(start) if start is not None else None
+        end = _utc(end) if end is not None else None
+        parts = [
+            part
+            for part in load_manifest(self.s3_service)["parts"]
+            if part["kind"] == kind and _overlaps(date.fromisoformat(part["date"]), start, end)
+        ]
+        names = None
+        if columns is not None:
+            names = ["key", "logged_at"] + [name for name in columns if name not in ("key", "logged_at")]
+        schema = SCHEMAS[kind] if names is None else pa.schema([SCHEMAS[kind].field(name) for name in names])
+        with ThreadPoolExecutor(max_workers=self.read_workers) as pool:
+            tables = list(pool.map(lambda part: self._read_part(part["key"], names, filters), parts))
+        frame = pa.concat_tables(tables).to_pandas() if tables else schema.empty_table().to_pandas()
+        if start is not None:
+            frame = frame[frame["logged_at"] >= pd.Timestamp(start)]
+        if end is not None:
+            frame = frame[frame["logged_at"] < pd.Timestamp(end)]
+        if latest:
+            frame = frame.sort_values("logged_at", kind="stable").drop_duplicates("key", keep="last")
+        return frame.sort_values("logged_at", kind="stable").reset_index(drop=True)
+
+    def failed_files(self, start: datetime | None = None, end: datetime | None = None) -> pd.DataFrame:
+        files = self.query(
+            FILES,
+            start,
+            end,
+            columns=["file_id", "original_filename", "detected_file_type", "processing_status", "errors"],
+        )
+        return files[files["processing_status"] == "failed"].reset_index(drop=True)
+
+    def ai_confidence_by_agent(self, start: datetime | None = None, end: datetime | None = None) -> pd.DataFrame:
+        decisions = self.query(AI, start, end, columns=["agent_name", "confidence"])
+        return (
+            decisions.groupby("agent_name")["confidence"]
+            .agg(["count", "mean"])
+            .rename(columns={"count": "decisions", "mean": "mean_confidence"})
+            .reset_index()
+        )
+
+    def _read_part(self, key: str, columns: List[str] | None, filters: List[Tuple[str, str, Any]] | None) -> pa.Table:
+        return pq.read_table(io.BytesIO(self.s3_service.get_bytes(key)), columns=columns, filters=filters)
+
+
+def manifest_key() -> str:
+    return f"{CONFIG.logs_prefix}/compacted/manifest.json"
+
+
+def load_manifest(s3_service: S3Service) -> Dict[str, Any]:
+    manifest = s3_service.get_json_or_none(manifest_key())
+    return manifest if manifest is not None else {"watermark": None, "parts": []}
+
+
+def _utc(value: datetime) -> datetime:
+    # Naive datetimes are taken as UTC, like every timestamp the loggers write.
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _partition(part: Dict[str, Any]) -> Tuple[str, date]:
+    return part["kind"], date.fromisoformat(part["date"])
+
+
+def _in_window(modified: datetime, since: datetime | None, until: datetime) -> bool:
+    return (since is None or modified >= since) and modified < until
+
+
+def _overlaps(day: date, start: datetime | None, end: datetime | None) -> bool:
+    return (start is None or day >= start.date()) and (end is None or day <= end.date())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compact the audit logs into date-partitioned Parquet.")
+    parser.add_argument("--lag-seconds", type=float, default=CONFIG.audit_compaction_lag_seconds)
+    parser.add_argument(
+        "--scan-objects",
+        action=argparse.BooleanOptionalAction,
+        default=not CONFIG.log_write_behind,
+        help="list the per-key log objects on every run, for loggers that write them directly",
+    )
+    args = parser.parse_args()
+    result = AuditLogCompactor(lag_seconds=args.lag_seconds, scan_objects=args.scan_objects).compact()
+    print(f"Compacted {result.records} records into {len(result.parts)} parts up to {result.watermark}")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,7 @@ class FileLog:
     errors: List[str] = field(default_factory=list)
     warnings: List[str] = field(default_factory=list)
     output_paths: List[str] = field(default_factory=list)
+    content_hash: str | None = None
 
     def to_payload(self) -> Dict[str, Any]:
         return {
@@ -30,6 +31,7 @@ class FileLog:
             "errors": self.errors,
             "warnings": self.warnings,
             "output_paths": self.output_paths,
+            "content_hash": self.content_hash,
         }
 
 
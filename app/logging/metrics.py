@@ -0,0 +1,316 @@
+"""In-process metrics with Prometheus text exposition, and timing spans.
+
+Job workers run in separate processes, so each worker writes a snapshot of
+its registry to ``CONFIG.metrics_dir`` after every job; the web process
+merges those snapshots with its own registry when ``/metrics`` is scraped.
+Snapshots of workers that have exited are folded into one retired snapshot,
+so the directory stays bounded and merged totals never go down.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from app.config.settings import CONFIG
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelValues = Tuple[str, ...]
+# Merged snapshots of worker processes that have exited.
+_RETIRED = "retired.json"
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float]) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[position] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "type": "histogram",
+                "help": self.help_text,
+                "labels": list(self.label_names),
+                "buckets": list(self.buckets),
+                "series": [[list(key), list(values)] for key, values in self._series.items()],
+            }
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str]) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._series: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "type": "counter",
+                "help": self.help_text,
+                "labels": list(self.label_names),
+                "series": [[list(key), value] for key, value in self._series.items()],
+            }
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Histogram | Counter] = {}
+        self._lock = threading.Lock()
+        self._instance: Tuple[int, str] | None = None
+
+    @property
+    def instance_id(self) -> str:
+        # Snapshot file name; regenerated in forked children, and random so a
+        # reused pid cannot overwrite the totals of an earlier worker.
+        if self._instance is None or self._instance[0] != os.getpid():
+            self._instance = (os.getpid(), f"{os.getpid()}-{uuid.uuid4().hex}")
+        return self._instance[1]
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, help_text, label_names, buckets)
+            return self._metrics[name]
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, help_text, label_names)
+            return self._metrics[name]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def write_snapshot(self, directory: str = CONFIG.metrics_dir) -> None:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.instance_id}.json")
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(self.snapshot(), handle)
+        os.replace(temp_path, path)
+
+    def render(self, directory: str | None = CONFIG.metrics_dir) -> str:
+        """Prometheus text format of this registry plus other processes' snapshots."""
+        snapshots = [self.snapshot()]
+        if directory and os.path.isdir(directory):
+            _retire_exited(directory)
+            own = f"{self.instance_id}.json"
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(".json") and name != own:
+                    snapshot = _read_snapshot(os.path.join(directory, name))
+                    if snapshot is not None:
+                        snapshots.append(snapshot)
+        return _render(_merge(snapshots))
+
+
+def _retire_exited(directory: str) -> None:
+    """Fold the snapshots of exited worker processes into ``retired.json``.
+
+    Snapshot names start with the writer's pid, and the directory is local
+    to the host, so a pid that no longer exists marks a finished worker.
+    """
+    exited = [name for name in os.listdir(directory) if not _process_alive(_snapshot_pid(name))]
+    if not exited:
+        return
+    retired_path = os.path.join(directory, _RETIRED)
+    # Several web processes may scrape at once; one folds each snapshot.
+    with open(os.path.join(directory, ".retire.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        snapshots, folded = [], []
+        for name in exited:
+            snapshot = _read_snapshot(os.path.join(directory, name))
+            if snapshot is not None:
+                snapshots.append(snapshot)
+                folded.append(name)
+        if not folded:
+            return
+        retired = _read_snapshot(retired_path)
+        merged = _merge([retired, *snapshots] if retired is not None else snapshots)
+        temp_path = f"{retired_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(_as_snapshot(merged), handle)
+        os.replace(temp_path, retired_path)
+        for name in folded:
+            os.remove(os.path.join(directory, name))
+
+
+def _snapshot_pid(name: str) -> int | None:
+    # Worker snapshots are named "{pid}-{random}.json" by ``instance_id``.
+    pid = name.split("-", 1)[0]
+    return int(pid) if name.endswith(".json") and name != _RETIRED and pid.isdigit() else None
+
+
+def _process_alive(pid: int | None) -> bool:
+    if pid is None:
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_snapshot(path: str) -> Dict[str, Dict[str, Any]] | None:
+    try:
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _as_snapshot(merged: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    return {
+        name: {**metric, "series": [[list(key), values] for key, values in metric["series"].items()]}
+        for name, metric in merged.items()
+    }
+
+
+def _merge(snapshots: Iterable[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    merged: Dict[str, Dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, "series": {}})
+            for labels, values in metric["series"]:
+                key = tuple(labels)
+                if metric["type"] == "counter":
+                    target["series"][key] = target["series"].get(key, 0.0) + values
+                elif key in target["series"]:
+                    target["series"][key] = [a + b for a, b in zip(target["series"][key], values)]
+                else:
+                    target["series"][key] = list(values)
+    return merged
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: Dict[str, str] | None = None) -> str:
+    pairs = list(zip(names, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value))
+
+
+def _render(metrics: Dict[str, Dict[str, Any]]) -> str:
+    lines: List[str] = []
+    for name in sorted(metrics):
+        metric = metrics[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        labels = metric["labels"]
+        for key, values in sorted(metric["series"].items()):
+            if metric["type"] == "counter":
+                lines.append(f"{name}{_label_text(labels, key)} {_number(values)}")
+                continue
+            for bound, count in zip(metric["buckets"] + [math.inf], values[:-1]):
+                le = {"le": _number(bound)}
+                lines.append(f"{name}_bucket{_label_text(labels, key, le)} {_number(count)}")
+            lines.append(f"{name}_sum{_label_text(labels, key)} {_number(values[-1])}")
+            lines.append(f"{name}_count{_label_text(labels, key)} {_number(values[-2])}")
+    return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+STAGE_SECONDS = METRICS.histogram("etl_stage_duration_seconds", "Duration of pipeline stages.", ("stage", "status"))
+STAGE_ROWS = METRICS.counter("etl_stage_rows_total", "Rows handled by pipeline stages.", ("stage",))
+STAGE_BYTES = METRICS.counter("etl_stage_bytes_total", "Bytes handled by pipeline stages.", ("stage",))
+AWS_CALL_SECONDS = METRICS.histogram(
+    "aws_call_duration_seconds",
+    "Latency of AWS API calls, including retries.",
+    ("service", "operation", "outcome"),
+)
+LOG_RECORDS_DROPPED = METRICS.counter(
+    "audit_log_records_dropped_total",
+    "Audit-log records given up on after repeated failed segment writes.",
+)
+
+
+class Span:
+    """Timing of one stage; ``metrics`` ends up in the WorkflowStep."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.metrics: Dict[str, Any] = {}
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at: datetime | None = None
+        self.status = "running"
+        self.failure_reason: str | None = None
+        self._started = time.perf_counter()
+        self.duration_seconds = 0.0
+
+    def finish(self, status: str, failure_reason: str | None = None) -> None:
+        self.duration_seconds = time.perf_counter() - self._started
+        self.finished_at = datetime.now(timezone.utc)
+        self.status = status
+        self.failure_reason = failure_reason
+        STAGE_SECONDS.observe(self.duration_seconds, stage=self.name, status=status)
+        for key, counter in (("rows", STAGE_ROWS), ("bytes", STAGE_BYTES)):
+            if isinstance(self.metrics.get(key), int):
+                counter.inc(self.metrics[key], stage=self.name)
+
+
+@contextmanager
+def span(name: str, workflow_log: Any = None) -> Iterator[Span]:
+    """Time a stage, record it in the stage histograms and, when given, as a step of ``workflow_log``.
+
+    Set ``rows`` or ``bytes`` in ``span.metrics`` to count them.
+    """
+    current = Span(name)
+    try:
+        yield current
+    except BaseException as error:
+        # Exceptions that are not failures (a deferred job) name their own status.
+        current.finish(getattr(error, "span_status", "failed"), f"{type(error).__name__}: {error}")
+        if workflow_log is not None:
+            workflow_log.add_span(current)
+        raise
+    current.finish("completed")
+    if workflow_log is not None:
+        workflow_log.add_span(current)
@@ -3,13 +3,31 @@
 from typing import Any, Dict
 
 from app.config.settings import CONFIG
+from app.logging.write_behind import WriteBehindLogSink
 from app.services.s3_service import S3Service
 
 
 class S3Logger:
-    def __init__(self, s3_service: S3Service | None = None) -> None:
+    def __init__(
+        self,
+        s3_service: S3Service | None = None,
+        sink: WriteBehindLogSink | None = None,
+        write_behind: bool = CONFIG.log_write_behind,
+    ) -> None:
         self.s3_service = s3_service or S3Service()
+        if sink is None and write_behind:
+            sink = WriteBehindLogSink(self.s3_service)
+        self.sink = sink
 
     def write(self, key: str, payload: Dict[str, Any]) -> None:
         full_key = f"{CONFIG.logs_prefix}/{key}"
+        if self.sink is not None:
+            self.sink.submit(full_key, payload)
+            return
         self.s3_service.put_json(full_key, payload)
+
+    def flush(self) -> bool:
+        """False when queued records could not be written yet."""
+        if self.sink is not None:
+            return self.sink.flush()
+        return True
@@ -4,6 +4,7 @@ from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Any, Dict, List
 
+from app.logging.metrics import Span
 from app.logging.s3_logger import S3Logger
 
 
@@ -14,6 +15,8 @@ class WorkflowStep:
     started_at: str
     finished_at: str | None = None
     failure_reason: str | None = None
+    metrics: Dict[str, Any] = field(default_factory=dict)
+    duration_seconds: float | None = None
 
 
 @dataclass
@@ -29,17 +32,44 @@ class WorkflowLog:
             "steps": [step.__dict__ for step in self.steps],
         }
 
-    def add_step(self, name: str, status: str, failure_reason: str | None = None) -> None:
+    def add_step(
+        self,
+        name: str,
+        status: str,
+        failure_reason: str | None = None,
+        metrics: Dict[str, Any] | None = None,
+        started_at: datetime | None = None,
+        finished_at: datetime | None = None,
+        duration_seconds: float | None = None,
+    ) -> None:
+        """Record a step; without timestamps it is an instant event at the current time."""
+        finished_at = finished_at or datetime.now(timezone.utc)
+        started_at = started_at or finished_at
+        if duration_seconds is None:
+            duration_seconds = (finished_at - started_at).total_seconds()
         self.steps.append(
             WorkflowStep(
                 name=name,
                 status=status,
-                started_at=datetime.now(timezone.utc).isoformat(),
-                finished_at=datetime.now(timezone.utc).isoformat(),
+                started_at=started_at.isoformat(),
+                finished_at=finished_at.isoformat(),
                 failure_reason=failure_reason,
+                metrics=metrics or {},
+                duration_seconds=duration_seconds,
             )
         )
 
+    def add_span(self, span: Span) -> None:
+        self.add_step(
+            span.name,
+            span.status,
+            failure_reason=span.failure_reason,
+            metrics=span.metrics,
+            started_at=span.started_at,
+            finished_at=span.finished_at,
+            duration_seconds=span.duration_seconds,
+        )
+
 
 class WorkflowLogger:
     def __init__(self, s3_logger: S3Logger | None = None) -> None:
@@ -0,0 +1,201 @@
+"""Write-behind batching of audit-log records into NDJSON segments on S3."""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+from app.config.settings import CONFIG
+from app.logging.metrics import LOG_RECORDS_DROPPED
+from app.services.s3_service import S3Service
+
+
+logger = logging.getLogger(__name__)
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+
+# One NDJSON line, serialized when the record is submitted.
+Record = str
+
+
+class _FlushRequest:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.error: Exception | None = None
+
+
+_STOP = object()
+
+
+def segment_key(now: datetime) -> str:
+    return (
+        f"{CONFIG.logs_prefix}/segments/{now:%Y/%m/%d}/"
+        f"{now:%H%M%S%f}-{uuid.uuid4().hex}.ndjson"
+    )
+
+
+class WriteBehindLogSink:
+    """Queues log records and writes them as batched NDJSON segments.
+
+    Each line holds the key the record would have been written to on its own,
+    the time it was queued and the original payload. A background thread
+    writes a segment once ``flush_records`` records are queued or
+    ``flush_interval`` seconds have passed. When the queue is full,
+    ``submit`` blocks for up to ``put_timeout`` seconds and then writes the
+    record synchronously.
+
+    Records of a failed write are retried on later cycles, at most
+    ``max_retained`` of them; older ones beyond that are dropped and counted
+    in ``dropped`` and ``audit_log_records_dropped_total``. ``close`` retries
+    the final records with backoff before giving up on them.
+    """
+
+    def __init__(
+        self,
+        s3_service: S3Service | None = None,
+        max_queue: int = CONFIG.log_queue_size,
+        flush_records: int = CONFIG.log_flush_records,
+        flush_interval: float = CONFIG.log_flush_interval_seconds,
+        put_timeout: float = CONFIG.log_put_timeout_seconds,
+        max_retained: int = CONFIG.log_max_retained_records,
+        close_attempts: int = CONFIG.log_close_attempts,
+        close_backoff: float = CONFIG.log_close_backoff_seconds,
+    ) -> None:
+        self.s3_service = s3_service or S3Service()
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.max_retained = max_retained
+        self.close_attempts = close_attempts
+        self.close_backoff = close_backoff
+        self.dropped = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="s3-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, key: str, payload: Dict[str, Any]) -> None:
+        # Serialize now: callers keep mutating the lists and dicts in their payloads.
+        record = json.dumps(
+            {"key": key, "queued_at": datetime.now(timezone.utc).isoformat(), "payload": payload},
+            ensure_ascii=False,
+        )
+        if self._closed:
+            self._write_segment([record])
+            return
+        try:
+            self._queue.put(record, timeout=self.put_timeout)
+        except queue.Full:
+            logger.warning("Log queue full; writing %s synchronously", key)
+            self._write_segment([record])
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every record submitted so far has been written.
+
+        False when the wait timed out or the write failed; failed records
+        stay queued for the next cycle.
+        """
+        if self._closed:
+            return True
+        request = _FlushRequest()
+        self._queue.put(request)
+        if not request.done.wait(timeout):
+            return False
+        return request.error is None
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        batch: List[Record] = []
+        deadline = time.monotonic() + self.flush_interval
+        # After a failed write, retry on the timer or a flush, not on every record.
+        failing = False
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                records, requests = self._drain()
+                error = self._write_final(batch + records)
+                for request in requests:
+                    request.error = error
+                    request.done.set()
+                return
+            if isinstance(item, str):
+                batch.append(item)
+            full = len(batch) >= self.flush_records and not failing
+            if item is None or isinstance(item, _FlushRequest) or full:
+                batch, error = self._write_batch(batch)
+                failing = error is not None
+                deadline = time.monotonic() + self.flush_interval
+                if isinstance(item, _FlushRequest):
+                    item.error = error
+                    item.done.set()
+
+    def _drain(self) -> Tuple[List[Record], List[_FlushRequest]]:
+        # Records and flushes that raced with close() are handled with the final batch.
+        records, requests = [], []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return records, requests
+            if isinstance(item, str):
+                records.append(item)
+            elif isinstance(item, _FlushRequest):
+                requests.append(item)
+
+    def _write_batch(self, batch: List[Record]) -> Tuple[List[Record], Exception | None]:
+        """Write ``batch`` in segments of at most ``flush_records``; returns the unwritten records and the error."""
+        while batch:
+            try:
+                self._write_segment(batch[: self.flush_records])
+            except Exception as error:
+                # Keep the records and retry on the next cycle; new
+                # records are added behind them.
+                logger.exception("Failed to write log segment; %d records pending", len(batch))
+                return self._retain(batch), error
+            batch = batch[self.flush_records :]
+        return batch, None
+
+    def _retain(self, batch: List[Record]) -> List[Record]:
+        excess = len(batch) - self.max_retained
+        if excess <= 0:
+            return batch
+        self._drop(excess)
+        return batch[excess:]
+
+    def _write_final(self, batch: List[Record]) -> Exception | None:
+        error = None
+        for attempt in range(self.close_attempts):
+            batch, error = self._write_batch(batch)
+            if not batch:
+                return None
+            if attempt + 1 < self.close_attempts:
+                time.sleep(self.close_backoff * 2**attempt)
+        self._drop(len(batch))
+        return error
+
+    def _drop(self, count: int) -> None:
+        self.dropped += count
+        LOG_RECORDS_DROPPED.inc(count)
+        logger.error("Dropped %d unwritten log records (%d in total)", count, self.dropped)
+
+    def _write_segment(self, batch: List[Record]) -> None:
+        body = ("\n".join(batch) + "\n").encode("utf-8")
+        self.s3_service.put_bytes(segment_key(datetime.now(timezone.utc)), body, NDJSON_CONTENT_TYPE)
@@ -0,0 +1,176 @@
+"""Content-addressed cache for Bedrock JSON responses."""
+
+from __future__ import annotations
+
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Protocol, Tuple
+
+
+from app.config.settings import CONFIG
+from app.services.s3_service import S3Service
+from app.utils.hash_utils import stable_hash
+
+
+MEMORY_HIT = "memory_hit"
+PERSISTENT_HIT = "persistent_hit"
+MISS = "miss"
+BYPASS = "bypass"
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    persistent_hits: int = 0
+    misses: int = 0
+    bypasses: int = 0
+
+
+class CacheStore(Protocol):
+    def get(self, key: str) -> Dict[str, Any] | None: ...
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+
+class DiskCacheStore:
+    def __init__(self, directory: str = CONFIG.bedrock_cache_dir) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        try:
+            with open(self._path(key), encoding="utf-8") as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        path = self._path(key)
+        # Write-then-rename so concurrent readers never see a partial entry.
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(entry, handle, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+
+class S3CacheStore:
+    def __init__(self, s3_service: S3Service | None = None) -> None:
+        self.s3_service = s3_service or S3Service()
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        return self.s3_service.get_json_or_none(self._key(key))
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        self.s3_service.put_json(self._key(key), entry)
+
+    def delete(self, key: str) -> None:
+        self.s3_service.client.delete_object(Bucket=self.s3_service.bucket, Key=self._key(key))
+
+    def _key(self, key: str) -> str:
+        return f"{CONFIG.cache_prefix}/bedrock/{key}.json"
+
+
+class BedrockResponseCache:
+    """In-process LRU with TTL in front of an optional persistent store.
+
+    Keys are ``stable_hash`` digests of ``{"model_id", "payload"}``, so the
+    same prompt against the same model always maps to the same entry.
+    """
+
+    def __init__(
+        self,
+        store: CacheStore | None = None,
+        max_entries: int = CONFIG.bedrock_cache_entries,
+        ttl_seconds: float = CONFIG.bedrock_cache_ttl_seconds,
+        persistent_ttl_seconds: float = CONFIG.bedrock_cache_persistent_ttl_seconds,
+    ) -> None:
+        self.store = store
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persistent_ttl_seconds = persistent_ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def key(self, model_id: str, payload: Dict[str, Any]) -> str:
+        return stable_hash({"model_id": model_id, "payload": payload})
+
+    def get(self, key: str) -> Tuple[str, Dict[str, Any] | None]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self._stats.memory_hits += 1
+                return MEMORY_HIT, copy.deepcopy(entry[1])
+            if entry is not None:
+                del self._entries[key]
+        if self.store is not None:
+            stored = self.store.get(key)
+            if stored is not None and now - stored["stored_at"] <= self.persistent_ttl_seconds:
+                self._remember(key, stored["response"], now)
+                with self._lock:
+                    self._stats.persistent_hits += 1
+                return PERSISTENT_HIT, copy.deepcopy(stored["response"])
+        with self._lock:
+            self._stats.misses += 1
+        return MISS, None
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        now = time.time()
+        self._remember(key, copy.deepcopy(response), now)
+        if self.store is not None:
+            self.store.put(key, {"stored_at": now, "response": response})
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self._stats.bypasses += 1
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.store is not None:
+            self.store.delete(key)
+
+    def clear(self) -> None:
+        """Drop the in-process tier; persistent entries expire by TTL."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(**self._stats.__dict__)
+
+    def _remember(self, key: str, response: Dict[str, Any], stored_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (stored_at, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def default_cache() -> BedrockResponseCache | None:
+    backend = CONFIG.bedrock_cache_backend
+    if backend == "none":
+        return None
+    if backend == "disk":
+        return BedrockResponseCache(DiskCacheStore())
+    if backend == "s3":
+        return BedrockResponseCache(S3CacheStore())
+    return BedrockResponseCache()
@@ -1,24 +1,130 @@
 """Bedrock integration for AI interpretation (JSON-only outputs)."""
 
 import json
-from typing import Any, Dict
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Sequence, Tuple
 
-import boto3
+from botocore.exceptions import ClientError, ConnectionClosedError, EndpointConnectionError, ReadTimeoutError
 
 from app.config.settings import CONFIG
+from app.services.bedrock_cache import BYPASS, MISS, BedrockResponseCache, default_cache
+from app.services.client_registry import CLIENTS, ClientRegistry
+from app.services.rate_limiter import TokenBucket
+
+
+THROTTLING_ERRORS = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+}
+# Retried like throttling, since botocore's own retries are off for this client.
+CONNECTION_ERRORS = (ConnectionClosedError, EndpointConnectionError, ReadTimeoutError)
 
 
 class BedrockService:
-    def __init__(self, region: str = CONFIG.aws_region) -> None:
-        self.client = boto3.client("bedrock-runtime", region_name=region)
+    def __init__(
+        self,
+        region: str = CONFIG.aws_region,
+        registry: ClientRegistry = CLIENTS,
+        cache: BedrockResponseCache | None = None,
+        endpoint_url: str | None = CONFIG.bedrock_endpoint_url,
+        rate_limiter: TokenBucket | None = None,
+    ) -> None:
+        self.region = region
+        self.registry = registry
+        self.cache = cache if cache is not None else default_cache()
+        self.endpoint_url = endpoint_url
+        self.rate_limiter = rate_limiter or TokenBucket(CONFIG.bedrock_requests_per_second)
+
+    @property
+    def client(self) -> Any:
+        # _invoke is the only retry layer, so every attempt waits for the rate limiter.
+        return self.registry.get("bedrock-runtime", self.region, self.endpoint_url, max_attempts=1)
+
+    def invoke_json_model(self, model_id: str, payload: Dict[str, Any], bypass_cache: bool = False) -> Dict[str, Any]:
+        response, _ = self.invoke_json_model_with_status(model_id, payload, bypass_cache)
+        return response
+
+    def invoke_json_model_with_status(
+        self,
+        model_id: str,
+        payload: Dict[str, Any],
+        bypass_cache: bool = False,
+    ) -> Tuple[Dict[str, Any], str]:
+        """Return the model response and how it was served (cache hit, miss or bypass)."""
+        if self.cache is None:
+            return self._invoke(model_id, payload), MISS
+        key = self.cache.key(model_id, payload)
+        if bypass_cache:
+            self.cache.record_bypass()
+            status = BYPASS
+        else:
+            status, cached = self.cache.get(key)
+            if cached is not None:
+                return cached, status
+        response = self._invoke(model_id, payload)
+        self.cache.put(key, response)
+        return response, status
 
-    def invoke_json_model(self, model_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    def invoke_json_models(
+        self,
+        model_id: str,
+        payloads: Sequence[Dict[str, Any]],
+        max_concurrency: int = CONFIG.bedrock_max_concurrency,
+        bypass_cache: bool = False,
+    ) -> List[Dict[str, Any]]:
+        results = self.invoke_json_models_with_status(model_id, payloads, max_concurrency, bypass_cache)
+        return [response for response, _ in results]
+
+    def invoke_json_models_with_status(
+        self,
+        model_id: str,
+        payloads: Sequence[Dict[str, Any]],
+        max_concurrency: int = CONFIG.bedrock_max_concurrency,
+        bypass_cache: bool = False,
+    ) -> List[Tuple[Dict[str, Any], str]]:
+        """Invoke the model for every payload with bounded concurrency; results keep input order."""
+        if not payloads:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(payloads))) as pool:
+            futures = [
+                pool.submit(self.invoke_json_model_with_status, model_id, payload, bypass_cache)
+                for payload in payloads
+            ]
+            return [future.result() for future in futures]
+
+    def invalidate_cached(self, model_id: str, payload: Dict[str, Any]) -> None:
+        if self.cache is not None:
+            self.cache.invalidate(self.cache.key(model_id, payload))
+
+    def _invoke(self, model_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         body = json.dumps(payload)
-        response = self.client.invoke_model(
-            modelId=model_id,
-            body=body,
-            contentType="application/json",
-            accept="application/json",
-        )
-        raw = response["body"].read()
-        return json.loads(raw)
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            try:
+                response = self.client.invoke_model(
+                    modelId=model_id,
+                    body=body,
+                    contentType="application/json",
+                    accept="application/json",
+                )
+            except (ClientError, *CONNECTION_ERRORS) as error:
+                attempt += 1
+                retryable = isinstance(error, CONNECTION_ERRORS) or (
+                    error.response.get("Error", {}).get("Code") in THROTTLING_ERRORS
+                )
+                if not retryable or attempt >= CONFIG.bedrock_max_attempts:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+            raw = response["body"].read()
+            return json.loads(raw)
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: a uniform delay up to the capped exponential bound.
+        ceiling = min(CONFIG.bedrock_backoff_max_seconds, CONFIG.bedrock_backoff_base_seconds * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
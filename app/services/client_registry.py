@@ -0,0 +1,136 @@
+"""Process-wide registry of lazily created, shared boto3 clients."""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Tuple
+
+import boto3
+from botocore.config import Config
+
+from app.config.settings import CONFIG
+from app.logging.metrics import AWS_CALL_SECONDS
+
+
+@dataclass
+class ClientStats:
+    clients_created: int = 0
+    client_hits: int = 0
+    requests: int = 0
+    new_connections: int = 0
+
+    @property
+    def reused_connections(self) -> int:
+        return max(self.requests - self.new_connections, 0)
+
+
+class ClientRegistry:
+    def __init__(
+        self,
+        max_pool_connections: int = CONFIG.aws_max_pool_connections,
+        max_attempts: int = CONFIG.aws_max_attempts,
+        retry_mode: str = CONFIG.aws_retry_mode,
+    ) -> None:
+        self.retry_mode = retry_mode
+        self.config = Config(
+            max_pool_connections=max_pool_connections,
+            retries={"max_attempts": max_attempts, "mode": retry_mode},
+        )
+        self._session: boto3.session.Session | None = None
+        self._clients: Dict[Tuple[str, str, str | None, int | None], Any] = {}
+        self._stats = ClientStats()
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        service_name: str,
+        region: str = CONFIG.aws_region,
+        endpoint_url: str | None = None,
+        max_attempts: int | None = None,
+    ) -> Any:
+        """The shared client; ``max_attempts`` overrides the registry's botocore attempts.
+
+        ``max_attempts`` counts the first try, so 1 turns botocore retries off
+        for callers that retry themselves.
+        """
+        key = (service_name, region, endpoint_url, max_attempts)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._stats.client_hits += 1
+                return client
+            # boto3 sessions are not thread-safe, so creation stays under the lock.
+            if self._session is None:
+                self._session = boto3.session.Session()
+            config = self.config
+            if max_attempts is not None:
+                config = config.merge(Config(retries={"total_max_attempts": max_attempts, "mode": self.retry_mode}))
+            client = self._session.client(
+                service_name,
+                region_name=region,
+                endpoint_url=endpoint_url,
+                config=config,
+            )
+            self._count_connections(client)
+            client.meta.events.register("before-send", self._record_request)
+            client.meta.events.register("before-call", _start_call_timer)
+            client.meta.events.register("after-call", _observe_call)
+            client.meta.events.register("after-call-error", _observe_failed_call)
+            self._clients[key] = client
+            self._stats.clients_created += 1
+            return client
+
+    def stats(self) -> ClientStats:
+        with self._lock:
+            return ClientStats(**self._stats.__dict__)
+
+    def _record_request(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._stats.requests += 1
+
+    def _record_connection(self) -> None:
+        with self._lock:
+            self._stats.new_connections += 1
+
+    def _count_connections(self, client: Any) -> None:
+        # botocore has no event for opened connections, so the client's pool
+        # classes are swapped for subclasses that count ``_new_conn``. The
+        # dict is shared with the session's proxy managers.
+        pool_classes = client._endpoint.http_session._pool_classes_by_scheme
+        for scheme, pool_class in pool_classes.items():
+            pool_classes[scheme] = _counting_pool(pool_class, self._record_connection)
+
+
+def _counting_pool(pool_class: type, on_new_connection: Callable[[], None]) -> type:
+    class CountingConnectionPool(pool_class):
+        def _new_conn(self) -> Any:
+            on_new_connection()
+            return super()._new_conn()
+
+    return CountingConnectionPool
+
+
+def _start_call_timer(model: Any, context: Dict[str, Any], **kwargs: Any) -> None:
+    # ``after-call-error`` carries no operation model, so keep its labels here.
+    context["call_started"] = (time.perf_counter(), model.service_model.endpoint_prefix, model.name)
+
+
+def _observe_call(context: Dict[str, Any], http_response: Any = None, **kwargs: Any) -> None:
+    status = getattr(http_response, "status_code", 200)
+    _observe(context, "ok" if status < 400 else "error")
+
+
+def _observe_failed_call(context: Dict[str, Any], **kwargs: Any) -> None:
+    _observe(context, "error")
+
+
+def _observe(context: Dict[str, Any], outcome: str) -> None:
+    started = context.pop("call_started", None)
+    if started is not None:
+        started_at, service, operation = started
+        AWS_CALL_SECONDS.observe(time.perf_counter() - started_at, service=service, operation=operation, outcome=outcome)
+
+
+CLIENTS = ClientRegistry()
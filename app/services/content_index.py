@@ -0,0 +1,59 @@
+"""Content-addressed index from uploaded input bytes to stored outputs."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from app.config.settings import CONFIG, AppConfig
+from app.engine.transformer import TRANSFORMER_VERSION
+from app.services.s3_service import S3Service
+from app.utils.hash_utils import stable_hash
+
+
+# AppConfig fields that change the generated outputs.
+OUTPUT_CONFIG_FIELDS = (
+    "house",
+    "collection_category",
+    "basic_supplier_code",
+    "pricelist_season",
+    "collection_code",
+    "code_category",
+    "color_prefix",
+    "date_1",
+    "date_2",
+    "date_3",
+)
+
+
+def content_key(content_sha256: str, config: AppConfig = CONFIG) -> str:
+    return stable_hash(
+        {
+            "content_sha256": content_sha256,
+            "config": {name: getattr(config, name) for name in OUTPUT_CONFIG_FIELDS},
+            "transformer_version": TRANSFORMER_VERSION,
+        }
+    )
+
+
+class ContentIndex:
+    def __init__(self, s3_service: S3Service | None = None) -> None:
+        self.s3_service = s3_service or S3Service()
+
+    def lookup(self, key: str) -> Dict[str, Any] | None:
+        return self.s3_service.get_json_or_none(self._index_key(key))
+
+    def record(self, key: str, file_id: str, output_paths: List[str]) -> None:
+        self.s3_service.put_json(
+            self._index_key(key),
+            {
+                "content_key": key,
+                "file_id": file_id,
+                "output_paths": output_paths,
+                "transformer_version": TRANSFORMER_VERSION,
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+            },
+        )
+
+    def _index_key(self, key: str) -> str:
+        return f"{CONFIG.cache_prefix}/content/{key}.json"
@@ -0,0 +1,251 @@
+"""Columnar (Parquet) cache of parsed input files, in S3 and on local disk.
+
+The Parquet copy sits next to the raw upload under
+``{inputs_prefix}/{file_id}/parsed/``. Reads go through a size-bounded local
+directory and are memory-mapped. Object columns hold whatever the workbook
+stored (text, ints, floats, None), so they are written with a per-value
+type tag and restored exactly; the transformer's string output depends on
+those Python types.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from botocore.exceptions import ClientError
+
+from app.config.settings import CONFIG
+from app.services.s3_service import PARQUET_CONTENT_TYPE, S3Service, is_missing_key
+
+
+logger = logging.getLogger(__name__)
+
+METADATA_KEY = b"erp_etl.columns"
+TAG_PREFIX = "__tag__"
+
+_NONE, _NAN, _STR, _INT, _FLOAT, _BOOL, _DATETIME = range(7)
+
+
+class UnsupportedColumn(TypeError):
+    pass
+
+
+def _tag(value: Any) -> int:
+    if value is None:
+        return _NONE
+    if isinstance(value, str):
+        return _STR
+    if isinstance(value, bool):
+        return _BOOL
+    if isinstance(value, int):
+        return _INT
+    if isinstance(value, float):
+        return _NAN if value != value else _FLOAT
+    if isinstance(value, datetime):
+        return _DATETIME
+    raise UnsupportedColumn(f"cannot cache values of type {type(value).__name__}")
+
+
+def _text(value: Any, tag: int) -> str | None:
+    if tag in (_NONE, _NAN):
+        return None
+    if tag == _FLOAT:
+        # float() first: numpy 2 reprs np.float64 as "np.float64(1.5)".
+        return repr(float(value))
+    if tag == _BOOL:
+        return "1" if value else "0"
+    if tag == _DATETIME:
+        return value.isoformat()
+    return str(value)
+
+
+def encode_frame(df: pd.DataFrame) -> pa.Table:
+    arrays: Dict[str, pa.Array] = {}
+    layout: List[Dict[str, Any]] = []
+    for name in df.columns:
+        series = df[name]
+        if series.dtype != object:
+            arrays[name] = pa.Array.from_pandas(series)
+            layout.append({"name": name, "encoding": "native"})
+            continue
+        values = series.to_numpy(dtype=object)
+        tags = np.fromiter((_tag(value) for value in values), dtype=np.int8, count=len(values))
+        present = set(np.unique(tags).tolist())
+        if present <= {_NONE, _STR} or present <= {_NAN, _STR}:
+            nulls = "nan" if _NAN in present else "none"
+            arrays[name] = pa.array(values, type=pa.string(), from_pandas=True)
+            layout.append({"name": name, "encoding": "string", "nulls": nulls})
+            continue
+        texts = [_text(value, tag) for value, tag in zip(values, tags.tolist())]
+        arrays[name] = pa.array(texts, type=pa.string())
+        arrays[TAG_PREFIX + name] = pa.array(tags, type=pa.int8())
+        layout.append({"name": name, "encoding": "tagged"})
+    table = pa.table(arrays) if arrays else pa.table({})
+    return table.replace_schema_metadata({METADATA_KEY: json.dumps(layout).encode("utf-8")})
+
+
+def text_frame(table: pa.Table) -> pd.DataFrame:
+    """The stored columns as Arrow-backed text, without restoring Python values.
+
+    Much smaller than ``decode_table`` for display: strings stay in Arrow
+    buffers, and tagged columns show the text they were stored as.
+    """
+    layout = json.loads(table.schema.metadata[METADATA_KEY])
+    data: Dict[str, pd.Series] = {}
+    for column in layout:
+        values = table.column(column["name"])
+        if column["encoding"] == "native":
+            data[column["name"]] = values.to_pandas()
+        else:
+            data[column["name"]] = pd.Series(pd.arrays.ArrowStringArray(values))
+    return pd.DataFrame(data, columns=[column["name"] for column in layout], index=pd.RangeIndex(table.num_rows))
+
+
+def decode_table(table: pa.Table, columns: Sequence[str] | None = None) -> pd.DataFrame:
+    layout = json.loads(table.schema.metadata[METADATA_KEY])
+    data: Dict[str, pd.Series] = {}
+    for column in layout:
+        name = column["name"]
+        if columns is not None and name not in columns:
+            continue
+        if column["encoding"] == "native":
+            data[name] = table.column(name).to_pandas()
+            continue
+        texts = table.column(name).to_numpy(zero_copy_only=False)
+        if column["encoding"] == "string":
+            if column["nulls"] == "nan":
+                texts[pd.isna(texts)] = np.nan
+            data[name] = pd.Series(texts, dtype=object)
+            continue
+        tags = table.column(TAG_PREFIX + name).to_numpy()
+        values = np.empty(len(tags), dtype=object)
+        values[tags == _NONE] = None
+        values[tags == _NAN] = np.nan
+        values[tags == _STR] = texts[tags == _STR]
+        values[tags == _INT] = [int(text) for text in texts[tags == _INT]]
+        values[tags == _FLOAT] = [float(text) for text in texts[tags == _FLOAT]]
+        values[tags == _BOOL] = (texts[tags == _BOOL] == "1").tolist()
+        values[tags == _DATETIME] = [datetime.fromisoformat(text) for text in texts[tags == _DATETIME]]
+        data[name] = pd.Series(values, dtype=object)
+    names = [column["name"] for column in layout if columns is None or column["name"] in columns]
+    return pd.DataFrame(data, columns=names, index=pd.RangeIndex(table.num_rows))
+
+
+class ParsedInputCache:
+    def __init__(
+        self,
+        s3_service: S3Service | None = None,
+        cache_dir: str = CONFIG.parsed_cache_dir,
+        max_bytes: int = CONFIG.parsed_cache_max_bytes,
+    ) -> None:
+        self.s3_service = s3_service or S3Service()
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def s3_key(self, file_id: str, file_type: str) -> str:
+        return f"{CONFIG.inputs_prefix}/{file_id}/parsed/{file_type}.parquet"
+
+    def get_or_parse(
+        self,
+        file_id: str,
+        file_type: str,
+        parse: Callable[[], pd.DataFrame],
+        columns: Sequence[str] | None = None,
+    ) -> Tuple[pd.DataFrame, bool]:
+        """Return the parsed frame and whether it came from the cache."""
+        cached = self.load(file_id, file_type, columns)
+        if cached is not None:
+            return cached, True
+        df = parse()
+        self.store(file_id, file_type, df)
+        return (df[list(columns)] if columns is not None else df), False
+
+    def load(self, file_id: str, file_type: str, columns: Sequence[str] | None = None) -> pd.DataFrame | None:
+        table = self.load_table(file_id, file_type)
+        return decode_table(table, columns) if table is not None else None
+
+    def load_table(self, file_id: str, file_type: str) -> pa.Table | None:
+        """The cached Parquet table as stored, before ``decode_table``."""
+        path = self._local_path(file_id, file_type)
+        if not os.path.exists(path) and not self._download(file_id, file_type, path):
+            return None
+        try:
+            # Touching the file marks it as recently used for eviction.
+            os.utime(path)
+            return pq.read_table(path, memory_map=True)
+        except FileNotFoundError:
+            # Evicted by another worker process sharing the directory since
+            # the check; read the S3 copy instead.
+            body = self.s3_service.get_bytes_or_none(self.s3_key(file_id, file_type))
+            return pq.read_table(pa.BufferReader(body)) if body is not None else None
+
+    def store(self, file_id: str, file_type: str, df: pd.DataFrame) -> bool:
+        """Write the Parquet copy locally and to S3; returns False if the frame cannot be cached."""
+        try:
+            table = encode_frame(df.reset_index(drop=True))
+        except (UnsupportedColumn, pa.ArrowException) as error:
+            logger.warning("Not caching parsed %s for %s: %s", file_type, file_id, error)
+            return False
+        path = self._local_path(file_id, file_type)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        pq.write_table(table, temp_path)
+        os.replace(temp_path, path)
+        self.s3_service.put_file(self.s3_key(file_id, file_type), path, PARQUET_CONTENT_TYPE)
+        self._evict(keep=path)
+        return True
+
+    def _download(self, file_id: str, file_type: str, path: str) -> bool:
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            self.s3_service.client.download_file(self.s3_service.bucket, self.s3_key(file_id, file_type), temp_path)
+        except ClientError as error:
+            if is_missing_key(error):
+                return False
+            raise
+        os.replace(temp_path, path)
+        self._evict(keep=path)
+        return True
+
+    def _evict(self, keep: str) -> None:
+        """Drop least recently used files until the directory fits ``max_bytes``.
+
+        Other worker processes evict from the same directory, so files may
+        vanish while this runs.
+        """
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".parquet") or os.path.join(self.cache_dir, name) == keep:
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+            total = sum(size for _, size, _ in entries)
+            try:
+                total += os.path.getsize(keep)
+            except FileNotFoundError:
+                pass
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def _local_path(self, file_id: str, file_type: str) -> str:
+        return os.path.join(self.cache_dir, f"{file_id}.{file_type}.parquet")
@@ -0,0 +1,306 @@
+"""Server-side paging, sorting and filtering of parsed and transformed frames.
+
+Backs the mapping preview's ``DataTable`` with ``page_action="custom"``: the
+browser only ever receives the visible page, however large the frame.
+Frames are kept in a size-bounded in-process LRU keyed by (file_id, output);
+each entry also remembers the row order of its last few sort/filter views, so
+paging through a sorted view does not sort again.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.config.settings import CONFIG
+from app.engine.ingestion import FILE_TYPE_OUTPUTS
+from app.engine.transformer import Transformer
+from app.services.parsed_input_cache import ParsedInputCache, text_frame
+
+
+INPUT = "input"
+
+# DataTable filter operators and their symbol forms.
+_OPERATORS = {
+    "ge": "ge",
+    ">=": "ge",
+    "le": "le",
+    "<=": "le",
+    "lt": "lt",
+    "<": "lt",
+    "gt": "gt",
+    ">": "gt",
+    "ne": "ne",
+    "!=": "ne",
+    "eq": "eq",
+    "=": "eq",
+    "contains": "contains",
+    "datestartswith": "datestartswith",
+}
+
+ViewKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+_TEXT = pd.StringDtype("pyarrow")
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """``df`` with object columns as Arrow-backed text, as the preview shows them.
+
+    A million-row object column holds a million Python objects; as Arrow
+    text it is one buffer, and it filters and sorts without mixed-type
+    comparisons.
+    """
+    columns = {}
+    for name in df.columns:
+        column = df[name]
+        if column.dtype == object:
+            column = column.astype(str).where(column.notna()).astype(_TEXT)
+        columns[name] = column
+    return pd.DataFrame(columns, index=pd.RangeIndex(len(df)))
+
+
+def parse_filter(filter_query: str | None) -> List[Tuple[str, str, str]]:
+    """Split a DataTable ``filter_query`` into (column, operator, value) conditions.
+
+    Operator words inside column names and values are left alone:
+
+    >>> parse_filter("{Storage Space} eq 001")
+    [('Storage Space', 'eq', '001')]
+    >>> parse_filter('{Greek Description} contains "large tee"')
+    [('Greek Description', 'contains', 'large tee')]
+    >>> parse_filter('{Length} < 5 && {Gender} ne "eq lt ge"')
+    [('Length', 'lt', '5'), ('Gender', 'ne', 'eq lt ge')]
+    >>> parse_filter("{Name} is blank")
+    []
+    """
+    conditions = []
+    for part in (filter_query or "").split(" && "):
+        condition = _split_condition(part)
+        if condition is not None:
+            conditions.append(condition)
+    return conditions
+
+
+def _split_condition(part: str) -> Tuple[str, str, str] | None:
+    # "{column} operator value": the operator is the token right after the
+    # column, so names and values may contain operator words.
+    part = part.strip()
+    close = part.find("}")
+    if not part.startswith("{") or close < 0:
+        return None
+    name = part[1:close]
+    token, _, value = part[close + 1 :].strip().partition(" ")
+    operator = _OPERATORS.get(token)
+    if operator is None and token[:1] in ("i", "s"):
+        # Case-insensitive and case-sensitive variants, e.g. "icontains" or "s=".
+        operator = _OPERATORS.get(token[1:])
+    if operator is None:
+        return None
+    value = value.strip()
+    if len(value) > 1 and value[0] == value[-1] and value[0] in ("'", '"', "`"):
+        value = value[1:-1].replace("\\" + value[0], value[0])
+    return name, operator, value
+
+
+def filter_mask(df: pd.DataFrame, conditions: Sequence[Tuple[str, str, str]]) -> np.ndarray:
+    """Rows matching every condition; conditions on unknown columns are ignored.
+
+    Comparisons are numeric when the value is a number, otherwise on the
+    text shown in the table.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for name, operator, value in conditions:
+        if name not in df.columns:
+            continue
+        column = df[name]
+        text = column.fillna("") if column.dtype == _TEXT else column.astype(str).where(column.notna(), "")
+        if operator == "contains":
+            mask &= text.str.contains(value, regex=False).to_numpy()
+            continue
+        if operator == "datestartswith":
+            mask &= text.str.startswith(value).to_numpy()
+            continue
+        try:
+            number = float(value)
+        except ValueError:
+            left, right = text, value
+        else:
+            left, right = pd.to_numeric(column.astype(object), errors="coerce"), number
+        if operator == "eq":
+            matched = left == right
+        elif operator == "ne":
+            matched = left != right
+        elif operator == "lt":
+            matched = left < right
+        elif operator == "le":
+            matched = left <= right
+        elif operator == "gt":
+            matched = left > right
+        else:
+            matched = left >= right
+        mask &= np.asarray(matched, dtype=bool)
+    return mask
+
+
+def sorted_positions(df: pd.DataFrame, positions: np.ndarray, sort_by: Sequence[Tuple[str, str]]) -> np.ndarray:
+    """``positions`` reordered by ``sort_by`` (column, "asc"/"desc") pairs; blanks last."""
+    sort_by = [(name, direction) for name, direction in sort_by if name in df.columns]
+    if not sort_by:
+        return positions
+    keys = {name: df[name].iloc[positions] for name, _ in sort_by}
+    order = pd.DataFrame(keys).reset_index(drop=True).sort_values(
+        [name for name, _ in sort_by],
+        ascending=[direction == "asc" for _, direction in sort_by],
+        kind="stable",
+        na_position="last",
+    )
+    return positions[order.index.to_numpy()]
+
+
+@dataclass
+class _Entry:
+    frame: pd.DataFrame
+    size: int
+    views: "OrderedDict[ViewKey, np.ndarray]" = field(default_factory=OrderedDict)
+
+
+class PreviewFrameCache:
+    """LRU of preview frames bounded by their in-memory size."""
+
+    def __init__(self, max_bytes: int = CONFIG.preview_cache_max_bytes, views_per_frame: int = 4) -> None:
+        self.max_bytes = max_bytes
+        self.views_per_frame = views_per_frame
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> pd.DataFrame | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry.frame
+
+    def put(self, key: Tuple[str, str], frame: pd.DataFrame) -> None:
+        size = int(frame.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            self._discard(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = _Entry(frame, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+
+    def view(self, key: Tuple[str, str], view: ViewKey) -> np.ndarray | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or view not in entry.views:
+                return None
+            entry.views.move_to_end(view)
+            return entry.views[view]
+
+    def put_view(self, key: Tuple[str, str], view: ViewKey, positions: np.ndarray) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.views[view] = positions
+            entry.views.move_to_end(view)
+            while len(entry.views) > self.views_per_frame:
+                entry.views.popitem(last=False)
+
+    def _discard(self, key: Tuple[str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+
+@dataclass
+class PreviewPage:
+    records: List[Dict[str, Any]]
+    columns: List[str]
+    page_count: int
+    total_rows: int
+    matching_rows: int
+
+
+class PreviewService:
+    def __init__(
+        self,
+        parsed_cache: ParsedInputCache | None = None,
+        transformer: Transformer | None = None,
+        cache: PreviewFrameCache | None = None,
+    ) -> None:
+        self.parsed_cache = parsed_cache or ParsedInputCache()
+        self.transformer = transformer or Transformer()
+        self.cache = cache or PreviewFrameCache()
+
+    def outputs(self, file_type: str) -> List[str]:
+        return [INPUT, *FILE_TYPE_OUTPUTS.get(file_type, ())]
+
+    def frame(self, file_id: str, file_type: str, output: str) -> pd.DataFrame | None:
+        """The parsed input or one transformed output; None until the file has been parsed."""
+        key = (file_id, output)
+        frame = self.cache.get(key)
+        if frame is not None:
+            return frame
+        if output == INPUT:
+            table = self.parsed_cache.load_table(file_id, file_type)
+            if table is None:
+                return None
+            frame = text_frame(table)
+        else:
+            parsed = self.parsed_cache.load(file_id, file_type)
+            if parsed is None:
+                return None
+            frame = compact_frame(self._builders()[output](parsed))
+        self.cache.put(key, frame)
+        return frame
+
+    def page(
+        self,
+        file_id: str,
+        file_type: str,
+        output: str,
+        page_current: int = 0,
+        page_size: int = CONFIG.preview_page_size,
+        sort_by: Sequence[Dict[str, str]] | None = None,
+        filter_query: str | None = None,
+    ) -> PreviewPage | None:
+        frame = self.frame(file_id, file_type, output)
+        if frame is None:
+            return None
+        sort = tuple((item["column_id"], item["direction"]) for item in sort_by or ())
+        view: ViewKey = (filter_query or "", sort)
+        positions = self.cache.view((file_id, output), view)
+        if positions is None:
+            positions = np.flatnonzero(filter_mask(frame, parse_filter(filter_query)))
+            positions = sorted_positions(frame, positions, sort)
+            self.cache.put_view((file_id, output), view, positions)
+        start = page_current * page_size
+        visible = frame.iloc[positions[start : start + page_size]].astype(object)
+        return PreviewPage(
+            records=visible.where(visible.notna(), None).to_dict("records"),
+            columns=[str(name) for name in frame.columns],
+            page_count=max(math.ceil(len(positions) / page_size), 1),
+            total_rows=len(frame),
+            matching_rows=len(positions),
+        )
+
+    def _builders(self) -> Dict[str, Callable[[pd.DataFrame], pd.DataFrame]]:
+        return {
+            "file_a": self.transformer.build_file_a,
+            "file_b": self.transformer.build_file_b,
+            "file_c": self.transformer.build_file_c,
+            # Every cancelled row of the file, without the delta against
+            # earlier change files that the pipeline applies.
+            "cancellations": lambda df: self.transformer.transform_changes(df).cancellations,
+            "order_confirmations": self.transformer.build_order_confirmations,
+        }
@@ -0,0 +1,30 @@
+"""Thread-safe token-bucket rate limiter."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, capacity: float | None = None) -> None:
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity if capacity is not None else max(rate_per_second, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are available; returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate_per_second
+            time.sleep(delay)
+            waited += delay
@@ -1,18 +1,87 @@
 """S3 client wrapper for reading/writing artifacts."""
 
+import io
 import json
-from typing import Any, Dict, Optional
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Any, BinaryIO, Callable, Dict, Iterator, List, Optional
 
-import boto3
+from botocore.exceptions import ClientError
 
 from app.config.settings import CONFIG
+from app.services.client_registry import CLIENTS, ClientRegistry
+
+
+PARQUET_CONTENT_TYPE = "application/vnd.apache.parquet"
+
+
+def is_missing_key(error: ClientError) -> bool:
+    return error.response.get("Error", {}).get("Code") in ("NoSuchKey", "404")
+
+
+def _read_full(stream: BinaryIO, size: int) -> bytes:
+    """Up to ``size`` bytes, reading again after short reads until the stream ends.
+
+    Pipes and sockets return what is available, but every multipart part
+    except the last must be full-sized.
+    """
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = stream.read(size - len(buffer))
+        if not chunk:
+            break
+        buffer += chunk
+    return bytes(buffer)
+
+
+class S3ObjectReader(io.RawIOBase):
+    """Read-only, unseekable file object over the chunks of an S3 object."""
+
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        self._chunks = chunks
+        self._chunk = b""
+        self._offset = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        while self._offset >= len(self._chunk):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._chunk, self._offset = chunk, 0
+        size = min(len(buffer), len(self._chunk) - self._offset)
+        buffer[:size] = self._chunk[self._offset : self._offset + size]
+        self._offset += size
+        return size
+
+    def close(self) -> None:
+        # Stops the ranged reads still in flight.
+        close = getattr(self._chunks, "close", None)
+        if close is not None:
+            close()
+        super().close()
 
 
 class S3Service:
-    def __init__(self, bucket: str = CONFIG.s3_bucket, region: str = CONFIG.aws_region) -> None:
+    def __init__(
+        self,
+        bucket: str = CONFIG.s3_bucket,
+        region: str = CONFIG.aws_region,
+        endpoint_url: str | None = CONFIG.s3_endpoint_url,
+        registry: ClientRegistry = CLIENTS,
+    ) -> None:
         self.bucket = bucket
         self.region = region
-        self.client = boto3.client("s3", region_name=region)
+        self.endpoint_url = endpoint_url
+        self.registry = registry
+
+    @property
+    def client(self) -> Any:
+        # Resolved on first use and shared with every other S3Service.
+        return self.registry.get("s3", self.region, self.endpoint_url)
 
     def put_bytes(self, key: str, data: bytes, content_type: str) -> None:
         self.client.put_object(
@@ -22,13 +91,207 @@ class S3Service:
             ContentType=content_type,
         )
 
+    def put_file(self, key: str, path: str, content_type: str) -> None:
+        # upload_file streams from disk and switches to multipart for large files.
+        self.client.upload_file(path, self.bucket, key, ExtraArgs={"ContentType": content_type})
+
     def put_json(self, key: str, payload: Dict[str, Any]) -> None:
         self.put_bytes(key, json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8"), "application/json")
 
+    def get_bytes(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    def get_bytes_or_none(self, key: str) -> bytes | None:
+        try:
+            return self.get_bytes(key)
+        except ClientError as error:
+            if is_missing_key(error):
+                return None
+            raise
+
     def get_json(self, key: str) -> Dict[str, Any]:
-        response = self.client.get_object(Bucket=self.bucket, Key=key)
-        body = response["Body"].read()
-        return json.loads(body.decode("utf-8"))
+        return json.loads(self.get_bytes(key).decode("utf-8"))
+
+    def get_json_or_none(self, key: str) -> Dict[str, Any] | None:
+        body = self.get_bytes_or_none(key)
+        return json.loads(body.decode("utf-8")) if body is not None else None
+
+    def iter_chunks(
+        self,
+        key: str,
+        part_size: int = CONFIG.download_part_size,
+        max_concurrency: int = CONFIG.download_max_concurrency,
+    ) -> Iterator[bytes]:
+        """Yield the object's bytes in order, ``part_size`` at a time.
+
+        With ``max_concurrency`` above 1 the parts are ranged GETs fetched
+        ahead in parallel, at most ``max_concurrency`` buffered at a time.
+        Every range is pinned to the ETag seen up front, so an object
+        overwritten mid-read fails with PreconditionFailed instead of
+        mixing two versions.
+        """
+        if max_concurrency <= 1:
+            body = self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+            yield from body.iter_chunks(part_size)
+            return
+        head = self.client.head_object(Bucket=self.bucket, Key=key)
+        size, etag = head["ContentLength"], head["ETag"]
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            pending: deque = deque()
+            try:
+                for start in range(0, size, part_size):
+                    end = min(start + part_size, size) - 1
+                    pending.append(pool.submit(self._get_range, key, start, end, etag))
+                    if len(pending) >= max_concurrency:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def open_reader(
+        self,
+        key: str,
+        part_size: int = CONFIG.download_part_size,
+        max_concurrency: int = CONFIG.download_max_concurrency,
+    ) -> BinaryIO:
+        """The object as a buffered, read-only file object; see ``iter_chunks``."""
+        return io.BufferedReader(S3ObjectReader(self.iter_chunks(key, part_size, max_concurrency)))
+
+    def download(
+        self,
+        key: str,
+        path: str,
+        part_size: int = CONFIG.download_part_size,
+        max_concurrency: int = CONFIG.download_max_concurrency,
+        on_chunk: Callable[[bytes], None] | None = None,
+    ) -> int:
+        """Write the object to ``path``, calling ``on_chunk`` with each part in order; returns its size."""
+        with open(path, "wb") as handle:
+            return self._copy_to(handle, key, part_size, max_concurrency, on_chunk)
+
+    def spool(
+        self,
+        key: str,
+        max_memory: int = CONFIG.download_spool_max_memory,
+        part_size: int = CONFIG.download_part_size,
+        max_concurrency: int = CONFIG.download_max_concurrency,
+    ) -> IO[bytes]:
+        """The object in a temporary file, kept in memory up to ``max_memory`` bytes, rewound."""
+        handle = tempfile.SpooledTemporaryFile(max_size=max_memory)
+        try:
+            self._copy_to(handle, key, part_size, max_concurrency, None)
+        except Exception:
+            handle.close()
+            raise
+        handle.seek(0)
+        return handle
+
+    def _copy_to(
+        self,
+        handle: IO[bytes],
+        key: str,
+        part_size: int,
+        max_concurrency: int,
+        on_chunk: Callable[[bytes], None] | None,
+    ) -> int:
+        size = 0
+        for chunk in self.iter_chunks(key, part_size, max_concurrency):
+            handle.write(chunk)
+            if on_chunk is not None:
+                on_chunk(chunk)
+            size += len(chunk)
+        return size
+
+    def _get_range(self, key: str, start: int, end: int, etag: str) -> bytes:
+        response = self.client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end}", IfMatch=etag)
+        return response["Body"].read()
+
+    def create_multipart_upload(self, key: str, content_type: str) -> str:
+        response = self.client.create_multipart_upload(
+            Bucket=self.bucket,
+            Key=key,
+            ContentType=content_type,
+        )
+        return response["UploadId"]
+
+    def generate_presigned_part_url(
+        self,
+        key: str,
+        upload_id: str,
+        part_number: int,
+        expires_in: int = 900,
+    ) -> str:
+        return self.client.generate_presigned_url(
+            ClientMethod="upload_part",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "UploadId": upload_id,
+                "PartNumber": part_number,
+            },
+            ExpiresIn=expires_in,
+        )
+
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: List[Dict[str, Any]]) -> None:
+        ordered = sorted(parts, key=lambda part: part["PartNumber"])
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": [{"PartNumber": part["PartNumber"], "ETag": part["ETag"]} for part in ordered]
+            },
+        )
+
+    def abort_multipart_upload(self, key: str, upload_id: str) -> None:
+        self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+
+    def upload_multipart(
+        self,
+        key: str,
+        stream: BinaryIO,
+        content_type: str,
+        part_size: int = CONFIG.upload_part_size,
+        max_concurrency: int = CONFIG.upload_max_concurrency,
+    ) -> None:
+        """Upload ``stream`` as parallel multipart parts; aborts the upload on failure.
+
+        At most ``max_concurrency`` parts are buffered at a time.
+        """
+        upload_id = self.create_multipart_upload(key, content_type)
+        parts: List[Dict[str, Any]] = []
+        try:
+            with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+                pending = []
+                part_number = 1
+                while True:
+                    chunk = _read_full(stream, part_size)
+                    if not chunk and part_number > 1:
+                        break
+                    pending.append(pool.submit(self._upload_part, key, upload_id, part_number, chunk))
+                    part_number += 1
+                    if len(pending) >= max_concurrency:
+                        parts.append(pending.pop(0).result())
+                    if len(chunk) < part_size:
+                        # Only the end of the stream leaves a part short.
+                        break
+                parts.extend(future.result() for future in pending)
+            self.complete_multipart_upload(key, upload_id, parts)
+        except Exception:
+            self.abort_multipart_upload(key, upload_id)
+            raise
+
+    def _upload_part(self, key: str, upload_id: str, part_number: int, data: bytes) -> Dict[str, Any]:
+        response = self.client.upload_part(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=data,
+        )
+        return {"PartNumber": part_number, "ETag": response["ETag"]}
 
     def generate_presigned_url(
         self,
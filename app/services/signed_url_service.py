@@ -1,15 +1,21 @@
 """Generate signed URLs for uploads/downloads."""
 
+import math
+from typing import Any, Dict, List
+
 from app.config.settings import CONFIG
 from app.services.s3_service import S3Service
 
 
+MAX_UPLOAD_PARTS = 10_000
+
+
 class SignedUrlService:
     def __init__(self, s3_service: S3Service | None = None) -> None:
         self.s3_service = s3_service or S3Service()
 
     def create_upload_url(self, file_id: str, filename: str, content_type: str) -> str:
-        key = f"{CONFIG.inputs_prefix}/{file_id}/{filename}"
+        key = self.input_key(file_id, filename)
         return self.s3_service.generate_presigned_url(
             key=key,
             method="put_object",
@@ -21,3 +27,47 @@ class SignedUrlService:
             key=key,
             method="get_object",
         )
+
+    def create_multipart_upload(
+        self,
+        file_id: str,
+        filename: str,
+        content_type: str,
+        size: int,
+    ) -> Dict[str, Any]:
+        """Start a multipart upload and presign one PUT URL per part for the browser."""
+        key = self.input_key(file_id, filename)
+        # S3 allows at most 10,000 parts, so very large files get bigger parts.
+        part_size = max(CONFIG.upload_part_size, math.ceil(size / MAX_UPLOAD_PARTS))
+        part_count = max(1, math.ceil(size / part_size))
+        upload_id = self.s3_service.create_multipart_upload(key, content_type)
+        return {
+            "file_id": file_id,
+            "key": key,
+            "upload_id": upload_id,
+            "part_size": part_size,
+            "parts": [
+                {
+                    "part_number": part_number,
+                    "url": self.s3_service.generate_presigned_part_url(key, upload_id, part_number),
+                }
+                for part_number in range(1, part_count + 1)
+            ],
+        }
+
+    def complete_multipart_upload(
+        self,
+        file_id: str,
+        filename: str,
+        upload_id: str,
+        parts: List[Dict[str, Any]],
+    ) -> str:
+        key = self.input_key(file_id, filename)
+        self.s3_service.complete_multipart_upload(key, upload_id, parts)
+        return key
+
+    def abort_multipart_upload(self, file_id: str, filename: str, upload_id: str) -> None:
+        self.s3_service.abort_multipart_upload(self.input_key(file_id, filename), upload_id)
+
+    def input_key(self, file_id: str, filename: str) -> str:
+        return f"{CONFIG.inputs_prefix}/{file_id}/{filename}"
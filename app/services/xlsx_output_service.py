@@ -0,0 +1,125 @@
+"""Write ERP output workbooks to S3 without materializing them in memory."""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Tuple
+
+import pandas as pd
+import xlsxwriter
+
+from app.config.settings import CONFIG
+from app.engine.transformer import TransformationResult
+from app.services.s3_service import S3Service
+
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+OUTPUT_NAMES = ("file_a", "file_b", "file_c", "cancellations")
+# Excel's hard row limit, including the header row.
+MAX_SHEET_ROWS = 1_048_576
+
+
+def output_key(file_id: str, name: str) -> str:
+    return f"{CONFIG.outputs_prefix}/{file_id}/{name}.xlsx"
+
+
+class XlsxOutputService:
+    def __init__(
+        self,
+        s3_service: S3Service | None = None,
+        max_workers: int = CONFIG.output_write_workers,
+        block_rows: int = CONFIG.xlsx_block_rows,
+    ) -> None:
+        self.s3_service = s3_service or S3Service()
+        self.max_workers = max_workers
+        self.block_rows = block_rows
+
+    def write_result(self, file_id: str, result: TransformationResult) -> Dict[str, str]:
+        outputs = {
+            name: [getattr(result, name)]
+            for name in OUTPUT_NAMES
+            if getattr(result, name) is not None
+        }
+        return self.write_outputs(file_id, outputs)
+
+    def write_outputs(self, file_id: str, outputs: Dict[str, Iterable[pd.DataFrame]]) -> Dict[str, str]:
+        """Write each named output and upload it; returns name -> S3 key.
+
+        xlsxwriter is pure Python and holds the GIL, so the workbooks are
+        written one after another on this thread; each upload runs on the
+        pool while the next workbook is written.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            uploads = {}
+            for name, frames in outputs.items():
+                path = self._write_temp(frames)
+                uploads[name] = pool.submit(self._upload, output_key(file_id, name), path)
+            return {name: future.result() for name, future in uploads.items()}
+
+    def write_output(self, file_id: str, name: str, frames: Iterable[pd.DataFrame]) -> str:
+        return self._upload(output_key(file_id, name), self._write_temp(frames))
+
+    def _write_temp(self, frames: Iterable[pd.DataFrame]) -> str:
+        handle, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(handle)
+        try:
+            self.write_workbook(path, frames)
+        except BaseException:
+            os.remove(path)
+            raise
+        return path
+
+    def _upload(self, key: str, path: str) -> str:
+        try:
+            self.s3_service.put_file(key, path, XLSX_CONTENT_TYPE)
+        finally:
+            os.remove(path)
+        return key
+
+    def write_workbook(self, path: str, frames: Iterable[pd.DataFrame]) -> int:
+        """Stream ``frames`` (chunks of one output) into ``path``; returns the row count.
+
+        constant_memory mode flushes every row to disk as soon as the next one
+        starts, so memory stays flat regardless of the number of rows.
+        """
+        workbook = xlsxwriter.Workbook(
+            path,
+            {
+                "constant_memory": True,
+                "strings_to_formulas": False,
+                "strings_to_urls": False,
+            },
+        )
+        written = 0
+        sheet_row = MAX_SHEET_ROWS
+        worksheet = None
+        columns: List[str] = []
+        try:
+            for frame in frames:
+                if not columns:
+                    columns = [str(column) for column in frame.columns]
+                for block in self._blocks(frame):
+                    for values in block:
+                        if sheet_row >= MAX_SHEET_ROWS:
+                            worksheet, sheet_row = self._add_sheet(workbook, columns)
+                        worksheet.write_row(sheet_row, 0, values)
+                        sheet_row += 1
+                        written += 1
+            if worksheet is None:
+                self._add_sheet(workbook, columns)
+        finally:
+            workbook.close()
+        return written
+
+    def _add_sheet(self, workbook: xlsxwriter.Workbook, columns: List[str]) -> Tuple[object, int]:
+        worksheet = workbook.add_worksheet()
+        worksheet.write_row(0, 0, columns)
+        return worksheet, 1
+
+    def _blocks(self, frame: pd.DataFrame) -> Iterable[Iterable[tuple]]:
+        for start in range(0, len(frame), self.block_rows):
+            block = frame.iloc[start : start + self.block_rows].astype(object)
+            block = block.where(block.notna(), None)
+            yield block.itertuples(index=False, name=None)
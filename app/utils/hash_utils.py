@@ -1,10 +1,142 @@
-"""Hash utilities for prompt snapshots and deterministic logging."""
+"""Hash utilities for prompt snapshots and deterministic logging.
+
+``stable_hash`` is the SHA-256 of ``json.dumps(payload, sort_keys=True,
+separators=(",", ":"))``. The bytes are streamed into the hasher instead of
+building the whole JSON string: large containers are walked member by
+member, and anything small is encoded in a single C-level ``json`` call.
+Digests are identical to the original one-shot implementation.
+"""
 
 import hashlib
 import json
-from typing import Any, Dict
+from functools import lru_cache
+from json.encoder import encode_basestring_ascii
+from typing import Any, Dict, Iterator, List
+
+import pandas as pd
+
+
+_ENCODER = json.JSONEncoder(sort_keys=True, separators=(",", ":"))
+# Flat containers (no nested dicts or lists) up to this many members are
+# encoded in one json call.
+_INLINE_MEMBERS = 64
+# Strings at least this long have their JSON encoding memoized.
+_MEMO_MIN_LENGTH = 4096
+# Upper bound on list members encoded together in one json call.
+_BATCH_MEMBERS = 256
+_BUFFER_BYTES = 64 * 1024
+_FRAME_BLOCK_ROWS = 100_000
 
 
 def stable_hash(payload: Dict[str, Any]) -> str:
-    normalized = json.dumps(payload, sort_keys=True, separators=(",", ":"))
-    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+    hasher = hashlib.sha256()
+    update_canonical(hasher, payload)
+    return hasher.hexdigest()
+
+
+def update_canonical(hasher: Any, payload: Any) -> None:
+    """Feed the canonical JSON encoding of ``payload`` into ``hasher``."""
+    buffer: List[bytes] = []
+    buffered = 0
+    for chunk in canonical_chunks(payload):
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= _BUFFER_BYTES:
+            hasher.update(b"".join(buffer))
+            buffer.clear()
+            buffered = 0
+    hasher.update(b"".join(buffer))
+
+
+def canonical_chunks(payload: Any) -> Iterator[bytes]:
+    """Yield the canonical JSON encoding of ``payload`` as UTF-8 chunks."""
+    return _chunks(payload, set())
+
+
+def frame_hash(df: pd.DataFrame) -> str:
+    """SHA-256 over a DataFrame's columns, dtypes, index and values.
+
+    Values are hashed in row blocks with ``pd.util.hash_pandas_object``, so
+    large snapshots never go through JSON.
+    """
+    hasher = hashlib.sha256()
+    update_canonical(hasher, {"columns": [str(column) for column in df.columns], "dtypes": [str(dtype) for dtype in df.dtypes]})
+    for start in range(0, len(df), _FRAME_BLOCK_ROWS):
+        block = df.iloc[start : start + _FRAME_BLOCK_ROWS]
+        hasher.update(pd.util.hash_pandas_object(block, index=True).to_numpy().tobytes())
+    return hasher.hexdigest()
+
+
+def _chunks(value: Any, in_progress: set) -> Iterator[bytes]:
+    if isinstance(value, str):
+        if len(value) >= _MEMO_MIN_LENGTH:
+            yield _encoded_string(value)
+        else:
+            yield encode_basestring_ascii(value).encode("ascii")
+    elif isinstance(value, dict) and not _inline(value.values()):
+        marker = _enter(value, in_progress)
+        yield b"{"
+        for position, (key, item) in enumerate(sorted(value.items())):
+            prefix = b"," if position else b""
+            yield prefix + encode_basestring_ascii(_key_text(key)).encode("ascii") + b":"
+            yield from _chunks(item, in_progress)
+        yield b"}"
+        in_progress.discard(marker)
+    elif isinstance(value, (list, tuple)) and not _inline(value):
+        marker = _enter(value, in_progress)
+        yield b"["
+        position = 0
+        while position < len(value):
+            if position:
+                yield b","
+            end = position
+            while end < len(value) and end - position < _BATCH_MEMBERS and _is_leaf(value[end]):
+                end += 1
+            if end > position:
+                # Runs of scalars and small flat rows go through json in one
+                # call; the slice's surrounding brackets are dropped.
+                yield _ENCODER.encode(value[position:end])[1:-1].encode("ascii")
+                position = end
+            else:
+                yield from _chunks(value[position], in_progress)
+                position += 1
+        yield b"]"
+        in_progress.discard(marker)
+    else:
+        yield _ENCODER.encode(value).encode("ascii")
+
+
+def _is_leaf(value: Any) -> bool:
+    if isinstance(value, dict):
+        return _inline(value.values())
+    if isinstance(value, (list, tuple)):
+        return _inline(value)
+    return not isinstance(value, str) or len(value) < _MEMO_MIN_LENGTH
+
+
+def _inline(members: Any) -> bool:
+    if len(members) > _INLINE_MEMBERS:
+        return False
+    return not any(isinstance(member, (dict, list, tuple)) for member in members)
+
+
+@lru_cache(maxsize=256)
+def _encoded_string(value: str) -> bytes:
+    return encode_basestring_ascii(value).encode("ascii")
+
+
+def _enter(value: Any, in_progress: set) -> int:
+    marker = id(value)
+    if marker in in_progress:
+        raise ValueError("Circular reference detected")
+    in_progress.add(marker)
+    return marker
+
+
+def _key_text(key: Any) -> str:
+    # Mirrors json's conversion of non-string keys.
+    if isinstance(key, str):
+        return key
+    if key is None or isinstance(key, (bool, int, float)):
+        return _ENCODER.encode(key)
+    raise TypeError(f"keys must be str, int, float, bool or None, not {key.__class__.__name__}")
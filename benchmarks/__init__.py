@@ -0,0 +1 @@
+"""Benchmarks for the ETL engine, hashing and logging paths."""
@@ -0,0 +1,64 @@
+"""Run the benchmark suites and save the results as JSON.
+
+Run with ``python -m benchmarks``, for example::
+
+    python -m benchmarks --rows 10000 100000 1000000 --output results/current.json
+    python -m benchmarks --output results/after.json --baseline results/current.json
+
+With ``--baseline`` the run is compared case by case against an earlier
+results file, and the exit status is 1 when a case got slower or used more
+memory than ``--tolerance`` allows.
+"""
+
+import argparse
+import sys
+
+from benchmarks import bench_engine, bench_hashing, bench_logging, bench_s3_reads
+from benchmarks.harness import compare, load_results, write_results
+
+
+SUITES = ("engine", "hashing", "logging", "s3_reads")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--hash-rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--log-records", type=int, nargs="+", default=[1_000])
+    parser.add_argument("--read-mib", type=int, nargs="+", default=[64], help="object sizes for the S3 read suite")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--check-rows", type=int, default=5_000, help="rows for the row-wise equivalence check; 0 skips it")
+    parser.add_argument("--check-trials", type=int, default=50, help="randomized frames for the equivalence check")
+    parser.add_argument("--endpoint-url", help="S3 stand-in for the logging and S3 read suites instead of an in-process moto server")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    results = []
+    if "engine" in args.suites:
+        if args.check_rows:
+            bench_engine.check_equivalence(args.check_rows, args.seed, args.check_trials)
+        results += bench_engine.run(args.rows, args.repeat, args.seed)
+    if "hashing" in args.suites:
+        results += bench_hashing.run(args.hash_rows, max(args.repeat, 1))
+    if "logging" in args.suites:
+        results += bench_logging.run(args.log_records, args.repeat, args.endpoint_url)
+    if "s3_reads" in args.suites:
+        results += bench_s3_reads.run(args.read_mib, args.repeat, args.endpoint_url)
+    write_results(args.output, results)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    if not args.baseline:
+        return 0
+    comparison = compare(results, load_results(args.baseline), args.tolerance)
+    for row in comparison:
+        marker = "REGRESSED" if row["regressed"] else ""
+        print(f"{row['key']:<50} time x{row['time_ratio']:5.2f} memory x{row['memory_ratio']:5.2f} {marker}")
+    return 1 if any(row["regressed"] for row in comparison) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Time and memory of every output builder and transform entry point.
+
+Run with ``python -m benchmarks.bench_engine``. Before timing, the column-level
+builders and column helpers are checked against the row-wise reference
+implementation, on a realistic frame and on randomized messy frames.
+"""
+
+from __future__ import annotations
+
+import argparse
+from typing import Callable, List, Tuple
+
+import pandas as pd
+
+from app.engine.cancellation_logic import build_cancellation_file
+from app.engine.parallel import ITEM_BUILDERS, transform_items_parallel
+from app.engine.reference import ItemMasterIndex, item_master_entries
+from app.engine.transformer import Transformer
+from app.utils.hash_utils import frame_hash
+from benchmarks.data import messy_frame, supplier_frame
+from benchmarks.harness import BenchmarkResult, format_result, measure
+
+
+SUITE = "engine"
+# Builders with both a row-wise and a column-level implementation.
+EQUIVALENCE_BUILDERS = ("build_file_a", "build_file_b", "build_file_c", "build_order_confirmations")
+# Every ``_..._column`` helper switches between the two implementations.
+COLUMN_HELPERS = tuple(
+    sorted(name for name in vars(Transformer) if name.startswith("_") and name.endswith("_column") and name != "_column")
+)
+
+
+def check_equivalence(rows: int, seed: int = 7, trials: int = 50) -> None:
+    """Raise AssertionError when the column-level path differs from the row-wise one.
+
+    The builders run on a realistic frame; then the builders and every
+    column helper run on ``trials`` messy frames with blanks, NaN, numbers,
+    padded text, categoricals and non-range indexes. The process-pool
+    transform must match ``transform_items`` exactly on the realistic frame
+    and the first messy one; it spawns a pool per call, so not on every trial.
+    """
+    reference = Transformer(vectorized=False)
+    vectorized = Transformer()
+    frames = [(f"seed {seed}", supplier_frame(rows, seed=seed, customer_code=True))]
+    frames += [(f"messy seed {seed + trial}", messy_frame(min(rows, 200), seed + trial)) for trial in range(trials)]
+    for label, df in frames:
+        for builder in EQUIVALENCE_BUILDERS:
+            expected = getattr(reference, builder)(df)
+            actual = getattr(vectorized, builder)(df)
+            # Constant columns are categorical on one path only; compare values.
+            pd.testing.assert_frame_equal(actual.astype(object), expected.astype(object), obj=f"{builder} ({label})")
+        # The Greek description helper reads the file A columns it joins.
+        file_a = reference.build_file_a(df)
+        for helper in COLUMN_HELPERS:
+            source = file_a if helper == "_greek_description_column" else df
+            pd.testing.assert_series_equal(
+                getattr(vectorized, helper)(source).astype(object),
+                getattr(reference, helper)(source).astype(object),
+                check_names=False,
+                obj=f"{helper} ({label})",
+            )
+    for label, df in frames[:2]:
+        expected = vectorized.transform_items(df)
+        actual, _ = transform_items_parallel(vectorized, df, max_workers=2, slice_rows=max(len(df) // 3, 1))
+        for builder in ITEM_BUILDERS:
+            pd.testing.assert_frame_equal(
+                getattr(actual, builder), getattr(expected, builder), obj=f"transform_items_parallel {builder} ({label})"
+            )
+
+
+def cases(rows: int, seed: int) -> List[Tuple[str, Callable[[], object]]]:
+    transformer = Transformer()
+    items = supplier_frame(rows, seed=seed)
+    changes = supplier_frame(rows, seed=seed, status=True)
+    orders = supplier_frame(rows, seed=seed, customer_code=True)
+    # Order lines carry the item in Col J and the color in Col K.
+    orders["Col J"], orders["Col K"] = items["Col D"], items["Col J"]
+    result = transformer.transform_items(items)
+    outputs = {"file_a": result.file_a, "file_b": result.file_b, "file_c": result.file_c}
+    item_master = ItemMasterIndex(item_master_entries(items, outputs))
+    return [
+        ("build_file_a", lambda: transformer.build_file_a(items)),
+        ("build_file_b", lambda: transformer.build_file_b(items)),
+        ("build_file_c", lambda: transformer.build_file_c(items)),
+        ("build_order_confirmations", lambda: transformer.build_order_confirmations(orders)),
+        ("build_cancellation_file", lambda: build_cancellation_file(changes)),
+        ("transform_items", lambda: transformer.transform_items(items)),
+        ("transform_items_parallel", lambda: transform_items_parallel(transformer, items)),
+        ("transform_changes", lambda: transformer.transform_changes(changes)),
+        ("transform_order_confirmations", lambda: transformer.transform_order_confirmations(orders)),
+        ("check_order_lines", lambda: ItemMasterIndex(item_master.entries).check_order_lines(orders)),
+        ("frame_hash", lambda: frame_hash(items)),
+    ]
+
+
+def run(row_counts: List[int], repeat: int = 1, seed: int = 7, only: List[str] | None = None) -> List[BenchmarkResult]:
+    results = []
+    for rows in row_counts:
+        for case, function in cases(rows, seed):
+            if only and case not in only:
+                continue
+            result = measure(SUITE, case, rows, function, repeat)
+            print(format_result(result), flush=True)
+            results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--check-rows", type=int, default=5_000)
+    parser.add_argument("--check-trials", type=int, default=50, help="randomized frames for the equivalence check")
+    parser.add_argument("--only", nargs="+", help="run only these cases")
+    args = parser.parse_args()
+
+    check_equivalence(args.check_rows, args.seed, args.check_trials)
+    run(args.rows, args.repeat, args.seed, args.only)
+
+
+if __name__ == "__main__":
+    main()
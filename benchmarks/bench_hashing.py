@@ -0,0 +1,96 @@
+"""Compare stable_hash with the original one-shot json.dumps digest.
+
+Run with ``python -m benchmarks.bench_hashing``.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from app.utils.hash_utils import stable_hash
+from benchmarks.harness import BenchmarkResult, format_result
+
+
+def one_shot_hash(payload: Dict[str, Any]) -> str:
+    normalized = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def build_prompt(rows: int, seed: int = 7) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    sample = [
+        {
+            "Col D": f"W{rng.randrange(10**6):06d}",
+            "Col I": rng.choice(["Logo tee", "Slim jeans", "Wrap dress"]),
+            "Col L": rng.choice(["M", "F"]),
+            "Col O": rng.choice(["XS", "S", "M", "L", "28", "30", "32"]),
+            "Col P": str(rng.randrange(10**12, 10**13)),
+            "Status": rng.choice(["", "ΑΚΥΡΟ"]),
+        }
+        for _ in range(rows)
+    ]
+    return {
+        "agent": "column_mapper",
+        "instructions": "Map the supplier headers to ERP fields. " * 200,
+        "input_snapshot": {"headers": list(sample[0]), "rows": sample},
+    }
+
+
+def measure(function: Callable[[Dict[str, Any]], str], payload: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        digest = function(payload)
+    seconds = (time.perf_counter() - started) / repeat
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"digest": digest, "seconds": seconds, "peak_bytes": peak}
+
+
+def run(row_counts: List[int], repeat: int = 3) -> List[BenchmarkResult]:
+    """Results of both digests per prompt size, in the shared results format."""
+    results = []
+    for rows in row_counts:
+        payload = build_prompt(rows)
+        measured = {"one_shot_hash": measure(one_shot_hash, payload, repeat)}
+        measured["stable_hash"] = measure(stable_hash, payload, repeat)
+        if measured["one_shot_hash"]["digest"] != measured["stable_hash"]["digest"]:
+            raise SystemExit(f"digest mismatch for {rows} rows")
+        for case, measurement in measured.items():
+            result = BenchmarkResult(
+                suite="hashing",
+                case=case,
+                rows=rows,
+                seconds=measurement["seconds"],
+                peak_bytes=measurement["peak_bytes"],
+                rows_per_second=rows / measurement["seconds"] if measurement["seconds"] else 0.0,
+            )
+            print(format_result(result), flush=True)
+            results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        payload = build_prompt(rows)
+        baseline = measure(one_shot_hash, payload, args.repeat)
+        streamed = measure(stable_hash, payload, args.repeat)
+        if baseline["digest"] != streamed["digest"]:
+            raise SystemExit(f"digest mismatch for {rows} rows")
+        print(
+            f"rows={rows:>7} one_shot={baseline['seconds'] * 1000:8.1f}ms peak={baseline['peak_bytes'] / 2**20:7.1f}MiB "
+            f"streamed={streamed['seconds'] * 1000:8.1f}ms peak={streamed['peak_bytes'] / 2**20:7.1f}MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
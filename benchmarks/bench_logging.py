@@ -0,0 +1,118 @@
+"""Throughput of the S3 audit-log paths against a local S3 stand-in.
+
+Run with ``python -m benchmarks.bench_logging``. Without ``--endpoint-url`` an
+in-process ``moto`` server is started, so absolute numbers mostly reflect
+request overhead; compare runs made against the same stand-in.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import socket
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from botocore.exceptions import ClientError
+
+from app.config.settings import CONFIG
+from app.logging.file_logger import FileLog, FileLogger
+from app.logging.s3_logger import S3Logger
+from app.logging.workflow_logger import WorkflowLog, WorkflowLogger
+from app.services.client_registry import ClientRegistry
+from app.services.s3_service import S3Service
+from benchmarks.harness import BenchmarkResult, format_result, measure
+
+
+SUITE = "logging"
+
+
+@contextmanager
+def local_s3(endpoint_url: str | None = None) -> Iterator[str]:
+    """Yield an S3 endpoint URL, starting a moto server when none is given."""
+    if endpoint_url:
+        yield endpoint_url
+        return
+    from moto.server import ThreadedMotoServer
+
+    # moto accepts any credentials, but botocore refuses to sign without some.
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False)
+    server.start()
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.stop()
+
+
+def create_bucket(s3_service: S3Service) -> None:
+    """Create the service's bucket, unless an earlier suite already did on the same stand-in."""
+    bucket = {"Bucket": s3_service.bucket}
+    if s3_service.region != "us-east-1":
+        bucket["CreateBucketConfiguration"] = {"LocationConstraint": s3_service.region}
+    try:
+        s3_service.client.create_bucket(**bucket)
+    except ClientError as error:
+        if error.response.get("Error", {}).get("Code") != "BucketAlreadyOwnedByYou":
+            raise
+
+
+def write_logs(s3_logger: S3Logger, records: int) -> None:
+    """The log records of ``records`` processed files: a file log and a workflow log each."""
+    file_logger = FileLogger(s3_logger)
+    workflow_logger = WorkflowLogger(s3_logger)
+    for number in range(records // 2):
+        file_id = f"benchmark-{number:07d}"
+        file_logger.write(
+            FileLog(
+                file_id=file_id,
+                original_filename=f"{file_id}.xlsx",
+                detected_file_type="COLLECTION_ITEMS",
+                processing_status="completed",
+                output_paths=[f"{CONFIG.outputs_prefix}/{file_id}/{name}.xlsx" for name in ("file_a", "file_b", "file_c")],
+            )
+        )
+        workflow_log = WorkflowLog(workflow_id=file_id, file_ids=[file_id])
+        for step in ("download", "parse", "transform", "validate", "write"):
+            workflow_log.add_step(step, "completed", metrics={"rows": 10_000})
+        workflow_logger.write(workflow_log)
+    s3_logger.flush()
+    if s3_logger.sink is not None:
+        s3_logger.sink.close()
+
+
+def run(record_counts: List[int], repeat: int = 1, endpoint_url: str | None = None) -> List[BenchmarkResult]:
+    results = []
+    with local_s3(endpoint_url) as url:
+        # A registry of its own, so the clients point at the stand-in.
+        s3_service = S3Service(endpoint_url=url, registry=ClientRegistry())
+        create_bucket(s3_service)
+        for records in record_counts:
+            for case, write_behind in (("s3_logger_direct", False), ("s3_logger_write_behind", True)):
+                result = measure(
+                    SUITE,
+                    case,
+                    records,
+                    lambda: write_logs(S3Logger(s3_service, write_behind=write_behind), records),
+                    repeat,
+                )
+                print(format_result(result), flush=True)
+                results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, nargs="+", default=[1_000])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--endpoint-url", help="S3 stand-in to use instead of an in-process moto server")
+    args = parser.parse_args()
+    run(args.records, args.repeat, args.endpoint_url)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Throughput of the S3 read paths against a local S3 stand-in.
+
+Run with ``python -m benchmarks.bench_s3_reads``. Compares one serial
+``get_object`` read with ``S3Service.iter_chunks`` and ``download`` at several
+concurrencies; "rows" are the object size in MiB. Against an in-process
+``moto`` server the parallel reads mostly overlap request overhead, so the
+gain on real S3 is larger.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+from typing import List
+
+from app.services.client_registry import ClientRegistry
+from app.services.s3_service import S3Service
+from benchmarks.bench_logging import create_bucket, local_s3
+from benchmarks.harness import BenchmarkResult, format_result, measure
+
+
+SUITE = "s3_reads"
+MIB = 1024 * 1024
+KEY = "benchmarks/s3_reads/object.bin"
+
+
+def drain(s3_service: S3Service, max_concurrency: int, part_size: int) -> int:
+    return sum(len(chunk) for chunk in s3_service.iter_chunks(KEY, part_size, max_concurrency))
+
+
+def run(
+    sizes_mib: List[int],
+    repeat: int = 1,
+    endpoint_url: str | None = None,
+    part_size: int = 8 * MIB,
+    concurrencies: List[int] | None = None,
+) -> List[BenchmarkResult]:
+    results = []
+    with local_s3(endpoint_url) as url, tempfile.TemporaryDirectory() as directory:
+        s3_service = S3Service(endpoint_url=url, registry=ClientRegistry())
+        create_bucket(s3_service)
+        path = os.path.join(directory, "object.bin")
+        for size in sizes_mib:
+            s3_service.put_bytes(KEY, os.urandom(size * MIB), "application/octet-stream")
+            cases = [
+                (
+                    "get_object_read",
+                    lambda: s3_service.client.get_object(Bucket=s3_service.bucket, Key=KEY)["Body"].read(),
+                )
+            ]
+            for concurrency in concurrencies or [1, 4, 8]:
+                cases.append(
+                    (f"iter_chunks_x{concurrency}", lambda concurrency=concurrency: drain(s3_service, concurrency, part_size))
+                )
+                cases.append(
+                    (
+                        f"download_x{concurrency}",
+                        lambda concurrency=concurrency: s3_service.download(KEY, path, part_size, concurrency),
+                    )
+                )
+            for case, function in cases:
+                result = measure(SUITE, case, size, function, repeat)
+                print(format_result(result), flush=True)
+                results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes-mib", type=int, nargs="+", default=[64])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--part-size-mib", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--endpoint-url", help="S3 stand-in to use instead of an in-process moto server")
+    args = parser.parse_args()
+    run(args.sizes_mib, args.repeat, args.endpoint_url, args.part_size_mib * MIB, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Seeded synthetic supplier frames shaped like parsed supplier files.
+
+Columns are "Col A" … "Col AJ" as ingestion names them, with the same
+categorical columns. Values are drawn from small pools the way real
+collections repeat them, while item codes and barcodes stay mostly unique.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from openpyxl.utils import get_column_letter
+
+from app.engine.delta import CANCELLED_STATUS
+from app.engine.ingestion import CATEGORICAL_COLUMNS
+
+
+SUPPLIER_COLUMNS = [f"Col {get_column_letter(position)}" for position in range(1, 37)]
+
+DESCRIPTIONS = ["Logo tee", "Slim jeans", "Wrap dress", "Wool coat", "Linen shirt", "Knit cardigan", "Pleated skirt"]
+COLORS = [("BLK", "Black"), ("WHT", "White"), ("NVY", "Navy"), ("RED", "Red"), ("BEI", "Beige"), ("OLV", "Olive")]
+SIZES = ["XS", "S", "M", "L", "XL", "XXL", "26", "28", "29", "30", "31", "32", "34", "36", "38", "40", "42", "44"]
+DROPS = np.array(["N", "N", "N", "A", "B", None], dtype=object)
+SEXES = np.array(["M", "F", "F", "U", None], dtype=object)
+COMPOSITIONS = ["100% cotton", "98% cotton 2% elastane", "100% wool", "55% linen 45% viscose", "100% polyester"]
+COUNTRIES = np.array(["IT", "CN", "TR", "PT", "BD", "IN"], dtype=object)
+CATEGORIES = np.array(["Tops", "Bottoms", "Dresses", "Outerwear", "Knitwear", " ", None], dtype=object)
+SUBCATEGORIES = np.array(["Basic", "Premium", "Denim", "", None], dtype=object)
+FLAGS = np.array(["Y", "N", "N", " y ", None], dtype=object)
+STATUSES = np.array(["", "", "", "", "", "", "", "", "ΝΕΟ", CANCELLED_STATUS], dtype=object)
+
+
+def _pick(rng: np.random.Generator, values: np.ndarray, rows: int) -> np.ndarray:
+    return values[rng.integers(0, len(values), rows)]
+
+
+def _objects(values: np.ndarray) -> np.ndarray:
+    return values.astype(str).astype(object)
+
+
+def _with_check_digit(body: np.ndarray, digits: int) -> np.ndarray:
+    """GTINs of ``digits`` digits for ``digits - 1`` digit bodies."""
+    total = np.zeros(len(body), dtype=np.int64)
+    remaining = body.copy()
+    # Weights alternate 3, 1, 3, … from the digit next to the check digit.
+    for position in range(digits - 1):
+        total += (remaining % 10) * (3 if position % 2 == 0 else 1)
+        remaining //= 10
+    return body * 10 + (10 - total % 10) % 10
+
+
+def _barcodes(rng: np.random.Generator, rows: int) -> tuple[np.ndarray, np.ndarray]:
+    """EAN-13 (Col P) and UPC-A (Col Q) columns with the mixed nulls of real files."""
+    ean = _objects(_with_check_digit(rng.integers(10**11, 10**12, rows), 13))
+    upc = _objects(_with_check_digit(rng.integers(10**10, 10**11, rows), 12))
+    # About 1% of barcodes carry a wrong check digit.
+    broken = rng.random(rows) < 0.01
+    ean[broken] = [value[:-1] + str((int(value[-1]) + 1) % 10) for value in ean[broken]]
+    kind = rng.random(rows)
+    ean[(kind >= 0.70) & (kind < 0.85)] = None
+    upc[kind < 0.70] = None
+    ean[kind >= 0.95] = None
+    upc[kind >= 0.95] = None
+    return ean, upc
+
+
+def supplier_frame(
+    rows: int,
+    seed: int = 7,
+    status: bool = False,
+    customer_code: bool = False,
+    categorical: bool = True,
+) -> pd.DataFrame:
+    """A supplier frame of ``rows`` rows; the same seed gives the same frame.
+
+    ``status`` adds the "Status" column of change files (some rows
+    cancelled with "ΑΚΥΡΟ"), ``customer_code`` the "Customer Code" column of
+    order confirmations.
+    """
+    rng = np.random.default_rng(seed)
+    items = max(rows // 8, 1)
+    item_codes = np.array([f"W{code:07d}" for code in rng.choice(10**7, items, replace=False)], dtype=object)
+    item = rng.integers(0, items, rows)
+    color = rng.integers(0, len(COLORS), rows)
+    color_codes = np.array([code for code, _ in COLORS], dtype=object)
+    color_names = np.array([name for _, name in COLORS], dtype=object)
+    ean, upc = _barcodes(rng, rows)
+    intrastat = _objects(rng.integers(10**7, 10**8, rows))
+    intrastat[rng.random(rows) < 0.02] = "6109.10"
+
+    columns = {name: _pick(rng, np.array([f"{name[4:]}{value}" for value in range(50)], dtype=object), rows)
+               for name in SUPPLIER_COLUMNS}
+    columns.update(
+        {
+            "Col D": item_codes[item],
+            "Col F": item_codes[item],
+            "Col G": color_codes[color],
+            "Col H": _pick(rng, np.array(["C1001", "C1002", "C2001", None], dtype=object), rows),
+            "Col I": _pick(rng, np.array(DESCRIPTIONS, dtype=object), rows),
+            "Col J": color_codes[color],
+            "Col K": color_names[color],
+            "Col L": _pick(rng, SEXES, rows),
+            "Col M": _pick(rng, np.array(COMPOSITIONS, dtype=object), rows),
+            "Col N": _pick(rng, DROPS, rows),
+            "Col O": _pick(rng, np.array(SIZES, dtype=object), rows),
+            "Col P": ean,
+            "Col Q": upc,
+            "Col R": intrastat,
+            "Col T": _objects(np.round(rng.uniform(0.1, 2.5, rows), 2)),
+            "Col V": _pick(rng, COUNTRIES, rows),
+            "Col AD": _pick(rng, CATEGORIES, rows),
+            "Col AG": _pick(rng, SUBCATEGORIES, rows),
+            "Col AH": _objects(np.round(rng.uniform(5, 400, rows), 2)),
+            "Col AI": _pick(rng, FLAGS, rows),
+            "Col AJ": _pick(rng, FLAGS, rows),
+        }
+    )
+    df = pd.DataFrame(columns)
+    if status:
+        df["Status"] = _pick(rng, STATUSES, rows)
+    if customer_code:
+        df["Customer Code"] = _pick(rng, np.array(["", "B7700", "B7701", None], dtype=object), rows)
+    if categorical:
+        for name in CATEGORICAL_COLUMNS:
+            df[name] = df[name].astype("category")
+    return df
+
+
+# Cell values the column-level builders must treat exactly like the row-wise
+# ones: blanks, padding, numbers and text that looks like numbers.
+MESSY_VALUES = np.array(
+    [None, np.nan, "", " ", "  x ", "N", "Y", " y", "M", "30", "30.5", "abc", 0, 7, 31, 2.5, 30.0, -1, "ΑΚΥΡΟ"],
+    dtype=object,
+)
+
+
+def messy_frame(rows: int, seed: int = 7) -> pd.DataFrame:
+    """A frame of every supplier column filled with ``MESSY_VALUES``, under a shuffled non-range index.
+
+    Random columns are categorical or plain floats, and the optional
+    customer-code columns are present in some seeds only.
+    """
+    rng = np.random.default_rng(seed)
+    names = SUPPLIER_COLUMNS + ["Status", "Customer Code", "Supplier Customer Code"]
+    if rng.random() < 0.5:
+        names.remove("Customer Code")
+    if rng.random() < 0.5:
+        names.remove("Supplier Customer Code")
+    labels = rng.permutation(rows * 3)[:rows] * 7 + 100
+    df = pd.DataFrame({name: _pick(rng, MESSY_VALUES, rows) for name in names}, index=labels)
+    for name in names:
+        kind = rng.random()
+        if kind < 0.2:
+            df[name] = df[name].astype(str).where(df[name].notna()).astype("category")
+        elif kind < 0.3:
+            df[name] = pd.Series(rng.choice([np.nan, 0.0, 30.0, 2.5], rows), index=df.index)
+    return df
@@ -0,0 +1,125 @@
+"""Timing, memory measurement and JSON results shared by the benchmark suites."""
+
+from __future__ import annotations
+
+import gc
+import json
+import os
+import platform
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class BenchmarkResult:
+    suite: str
+    case: str
+    rows: int
+    seconds: float
+    peak_bytes: int
+    rows_per_second: float
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        return f"{self.suite}/{self.case}/{self.rows}"
+
+
+def measure(suite: str, case: str, rows: int, function: Callable[[], Any], repeat: int = 1) -> BenchmarkResult:
+    """Best wall time over ``repeat`` runs, then one traced run for peak memory.
+
+    Tracing slows allocations down, so it is kept out of the timed runs.
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    seconds = min(timings)
+    return BenchmarkResult(
+        suite=suite,
+        case=case,
+        rows=rows,
+        seconds=seconds,
+        peak_bytes=peak,
+        rows_per_second=rows / seconds if seconds else 0.0,
+    )
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def write_results(path: str, results: List[BenchmarkResult]) -> None:
+    payload = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": environment(),
+        "results": [asdict(result) for result in results],
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle, indent=2)
+
+
+def load_results(path: str) -> List[BenchmarkResult]:
+    with open(path, encoding="utf-8") as handle:
+        return [BenchmarkResult(**result) for result in json.load(handle)["results"]]
+
+
+def compare(
+    results: List[BenchmarkResult],
+    baseline: List[BenchmarkResult],
+    tolerance: float = 0.10,
+) -> List[Dict[str, Any]]:
+    """Cases present in both runs, with their time and peak-memory ratios.
+
+    A case regresses when either ratio exceeds ``1 + tolerance``.
+    """
+    previous = {result.key: result for result in baseline}
+    rows = []
+    for result in results:
+        before = previous.get(result.key)
+        if before is None:
+            continue
+        time_ratio = result.seconds / before.seconds if before.seconds else float("inf")
+        memory_ratio = result.peak_bytes / before.peak_bytes if before.peak_bytes else 1.0
+        rows.append(
+            {
+                "key": result.key,
+                "seconds": result.seconds,
+                "baseline_seconds": before.seconds,
+                "time_ratio": time_ratio,
+                "peak_bytes": result.peak_bytes,
+                "baseline_peak_bytes": before.peak_bytes,
+                "memory_ratio": memory_ratio,
+                "regressed": time_ratio > 1 + tolerance or memory_ratio > 1 + tolerance,
+            }
+        )
+    return rows
+
+
+def format_result(result: BenchmarkResult) -> str:
+    return (
+        f"{result.key:<50} {result.seconds * 1000:10.1f}ms {result.rows_per_second:12,.0f} rows/s "
+        f"peak={result.peak_bytes / 2**20:8.1f}MiB"
+    )